@@ -0,0 +1,295 @@
+############################################################
+## CSC 384, Intro to AI, University of Toronto.
+## Assignment 1
+##
+## Batch solver: solves every level of a directory or of a
+## multi-level file in worker processes, with a time and
+## memory limit per level, and writes one CSV or JSON line per level.
+############################################################
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import queue
+import resource
+import signal
+import sys
+import time
+
+from board import *
+from solve import search, ALGORITHMS, HEURISTICS
+from stats import SearchStats
+
+# The columns of a result line, in order.
+FIELDS = ['level', 'name', 'algorithm', 'heuristic', 'status', 'cost', 'expanded', 'generated',
+          'time', 'peak_memory_kb']
+
+# Algorithms that start processes of their own, which a batch worker can't.
+UNBATCHABLE = ('portfolio', 'parallel_a_star')
+
+# Seconds between two checks for workers that died without a result.
+POLL_INTERVAL = 1.0
+
+# The part of the time limit an anytime search gets as its budget, so that it returns
+# its best solution before the alarm goes off.
+ANYTIME_SHARE = 0.8
+
+
+class LevelTimeout(Exception):
+    pass
+
+
+def _raise_timeout(signum, frame):
+    raise LevelTimeout()
+
+
+def collect_levels(path):
+    """
+    Returns (level id, board) for every level in path: a directory of puzzle files (*.txt),
+    each holding one or more levels, or a single such file. A level id is the file name,
+    followed by '#' and the level's position when the file holds several.
+
+    :param path: A directory or a file.
+    :type path: str
+    :rtype: List[tuple]
+    """
+    if os.path.isdir(path):
+        files = [os.path.join(path, name) for name in sorted(os.listdir(path))
+                 if name.endswith('.txt') and os.path.isfile(os.path.join(path, name))]
+    else:
+        files = [path]
+
+    levels = []
+    for filename in files:
+        boards = read_all_from_file(filename)
+        for index, board in enumerate(boards):
+            level_id = filename if len(boards) == 1 else '{}#{}'.format(filename, index + 1)
+            levels.append((level_id, board))
+    return levels
+
+
+def solve_level(task):
+    """
+    Solves one level inside a worker process and returns its result line as a dict.
+    The worker is used for this level only, so the limits and the peak memory
+    measured are the level's own.
+
+    :param task: (level id, board, algorithm, heuristic, time limit in s, memory limit in MB)
+    :type task: tuple
+    :rtype: dict
+    """
+    level_id, board, algorithm, heuristic, time_limit, memory_limit = task
+    if memory_limit is not None:
+        limit = memory_limit * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    if time_limit is not None:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, time_limit)
+
+    stats = SearchStats()
+    cost = -1
+    time_start = time.time()
+    budget = None if time_limit is None else time_limit * ANYTIME_SHARE
+    try:
+        path, cost = search(board, algorithm, HEURISTICS[heuristic], stats, time_limit=budget)
+        status = 'solved' if path else 'unsolvable'
+    except LevelTimeout:
+        status = 'timeout'
+    except MemoryError:
+        status = 'memory'
+    except Exception as e:
+        # one broken level shouldn't take the rest of the batch down with it
+        status = 'error: {}: {}'.format(type(e).__name__, e)
+    finally:
+        if time_limit is not None:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    time_elapsed = time.time() - time_start
+
+    return {
+        'level': level_id,
+        'name': board.name,
+        'algorithm': algorithm,
+        'heuristic': heuristic,
+        'status': status,
+        'cost': cost,
+        'expanded': stats.expanded,
+        'generated': stats.generated,
+        'time': round(time_elapsed, 3),
+        # ru_maxrss is in kilobytes on Linux
+        'peak_memory_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def _run_level(index, task, results):
+    results.put((index, solve_level(task)))
+
+
+def run_levels(tasks, workers=None):
+    """
+    Solves the levels of the tasks, each in a process of its own with at most workers at once,
+    and yields their result lines as they finish. A process that dies without a result, e.g.
+    killed for running out of memory, gives a line with status 'crashed' instead of stopping the batch.
+
+    :param tasks: Tasks for solve_level.
+    :type tasks: List[tuple]
+    :param workers: The number of levels solved at once; one per core by default.
+    :type workers: Optional[int]
+    :rtype: Iterator[dict]
+    """
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    results = multiprocessing.Queue()
+    pending = list(enumerate(tasks))
+    pending.reverse()
+    # index -> (process, start time)
+    running = {}
+    while pending or running:
+        while pending and len(running) < workers:
+            index, task = pending.pop()
+            process = multiprocessing.Process(target=_run_level, args=(index, task, results), daemon=True)
+            process.start()
+            running[index] = (process, time.time())
+
+        try:
+            index, result = results.get(timeout=POLL_INTERVAL)
+        except queue.Empty:
+            pass
+        else:
+            if index in running:
+                running.pop(index)[0].join()
+                yield result
+            continue
+
+        for index, (process, time_start) in list(running.items()):
+            # a clean exit means the result is still on its way
+            if process.exitcode is not None and process.exitcode != 0:
+                del running[index]
+                level_id, board, algorithm, heuristic, time_limit, memory_limit = tasks[index]
+                yield {
+                    'level': level_id,
+                    'name': board.name,
+                    'algorithm': algorithm,
+                    'heuristic': heuristic,
+                    'status': 'crashed (exit code {})'.format(process.exitcode),
+                    'cost': -1,
+                    'expanded': None,
+                    'generated': None,
+                    'time': round(time.time() - time_start, 3),
+                    'peak_memory_kb': None,
+                }
+
+
+def solve_batch(levels, algorithm, heuristic, output, output_format='csv', workers=None,
+                time_limit=None, memory_limit=None):
+    """
+    Solve the levels in worker processes and write a result line per level to output
+    as soon as it is done, so results are not lost if the batch is interrupted.
+
+    :param levels: (level id, board) pairs, as returned by collect_levels.
+    :type levels: List[tuple]
+    :param algorithm: The search algorithm, one of ALGORITHMS except those in UNBATCHABLE.
+    :type algorithm: str
+    :param heuristic: The name of the heuristic, one of HEURISTICS.
+    :type heuristic: str
+    :param output: The file the lines are written to.
+    :type output: TextIO
+    :param output_format: 'csv' or 'json' (one JSON object per line).
+    :type output_format: str
+    :param workers: The number of levels solved at once; one per core by default.
+    :type workers: Optional[int]
+    :param time_limit: The time limit per level in seconds, or None.
+    :type time_limit: Optional[float]
+    :param memory_limit: The address space limit per level in MB, or None.
+    :type memory_limit: Optional[int]
+    :return: the result lines, in completion order
+    :rtype: List[dict]
+    """
+    if algorithm in UNBATCHABLE:
+        raise ValueError("{} can't run inside a batch worker".format(algorithm))
+    writer = None
+    if output_format == 'csv':
+        writer = csv.DictWriter(output, fieldnames=FIELDS)
+        writer.writeheader()
+
+    tasks = [(level_id, board, algorithm, heuristic, time_limit, memory_limit) for level_id, board in levels]
+    results = []
+    for result in run_levels(tasks, workers):
+        if writer is not None:
+            writer.writerow(result)
+        else:
+            output.write(json.dumps(result) + '\n')
+        output.flush()
+        results.append(result)
+    return results
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Solve many Sokoban levels in parallel.")
+    parser.add_argument(
+        "--input",
+        type=str,
+        required=True,
+        help="A directory of puzzle files (*.txt) or a file with one or more puzzles."
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        required=False,
+        default=None,
+        help="The file the result lines are written to; standard output by default."
+    )
+    parser.add_argument(
+        "--format",
+        type=str,
+        required=False,
+        default='csv',
+        choices=['csv', 'json'],
+        help="Write CSV, or one JSON object per line."
+    )
+    parser.add_argument(
+        "--algorithm",
+        type=str,
+        required=True,
+        choices=[algorithm for algorithm in ALGORITHMS if algorithm not in UNBATCHABLE],
+        help="The searching algorithm."
+    )
+    parser.add_argument(
+        "--heuristic",
+        type=str,
+        required=False,
+        default='zero',
+        choices=list(HEURISTICS),
+        help="The heuristic used for any heuristic search."
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        required=False,
+        default=None,
+        help="The number of levels solved at once; one per core by default."
+    )
+    parser.add_argument(
+        "--time-limit",
+        type=float,
+        required=False,
+        default=None,
+        help="The time limit per level in seconds."
+    )
+    parser.add_argument(
+        "--memory-limit",
+        type=int,
+        required=False,
+        default=None,
+        help="The memory (address space) limit per level in MB."
+    )
+    args = parser.parse_args()
+
+    levels = collect_levels(args.input)
+    output = sys.stdout if args.output is None else open(args.output, 'w', newline='')
+    solve_batch(levels, args.algorithm, args.heuristic, output, args.format, args.workers,
+                args.time_limit, args.memory_limit)
+    if output is not sys.stdout:
+        output.close()
@@ -0,0 +1,239 @@
+############################################################
+## CSC 384, Intro to AI, University of Toronto.
+## Assignment 1
+##
+## Benchmark suite: runs dfs and A* with every heuristic on the
+## levels in benchmarks/levels, each run in a fresh process, and
+## compares expansions, time and peak memory with a stored baseline.
+############################################################
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+
+from batch import collect_levels, solve_level
+from solve import HEURISTICS
+
+BENCHMARK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks')
+LEVEL_DIR = os.path.join(BENCHMARK_DIR, 'levels')
+BASELINE_FILE = os.path.join(BENCHMARK_DIR, 'baseline.json')
+
+# The (algorithm, heuristic) configurations every level is run with.
+CONFIGS = [('dfs', 'zero')] + [('a_star', heuristic) for heuristic in HEURISTICS]
+
+# Times below this many seconds are too noisy to flag.
+MIN_TIME = 0.05
+
+
+def run_key(result):
+    """
+    Returns the name a run is stored under in the baseline.
+
+    :param result: A result line from batch.solve_level.
+    :type result: dict
+    :rtype: str
+    """
+    return '{}|{}|{}'.format(result['level'], result['algorithm'], result['heuristic'])
+
+
+def run_suite(level_dir=LEVEL_DIR, configs=CONFIGS, time_limit=None, memory_limit=None, workers=1, repeat=1):
+    """
+    Runs every configuration on every level, each in a fresh process so that
+    peak memory is measured per run. With repeat > 1 every run is made that many
+    times and the best time and peak memory are kept, which takes out most of the noise.
+
+    :param level_dir: The directory of benchmark levels.
+    :type level_dir: str
+    :param configs: (algorithm, heuristic name) pairs.
+    :type configs: List[tuple]
+    :param time_limit: The time limit per run in seconds, or None.
+    :type time_limit: Optional[float]
+    :param memory_limit: The address space limit per run in MB, or None.
+    :type memory_limit: Optional[int]
+    :param workers: The number of runs at once; more than one makes the times less reliable.
+    :type workers: int
+    :param repeat: The number of times each run is made.
+    :type repeat: int
+    :return: the result lines, keyed by run_key
+    :rtype: dict
+    """
+    tasks = [(level_id, board, algorithm, heuristic, time_limit, memory_limit)
+             for level_id, board in collect_levels(level_dir) for algorithm, heuristic in configs
+             for i in range(repeat)]
+    results = {}
+    with multiprocessing.Pool(processes=workers, maxtasksperchild=1) as pool:
+        for result in pool.imap(solve_level, tasks):
+            # the baseline shouldn't depend on where the checkout is
+            result['level'] = os.path.basename(result['level'])
+            key = run_key(result)
+            best = results.get(key)
+            if best is None:
+                results[key] = result
+            else:
+                best['time'] = min(best['time'], result['time'])
+                best['peak_memory_kb'] = min(best['peak_memory_kb'], result['peak_memory_kb'])
+    return results
+
+
+def compare(results, baseline, tolerance=0.1, time_tolerance=0.25):
+    """
+    Compares results with the baseline and returns the regressions and the warnings
+    found, each a list of (run key, reason) pairs. A run regresses if it no longer solves
+    its level, if A* finds a costlier solution, or if its expansions grow by more than
+    tolerance; these don't depend on the machine. Time growing by more than time_tolerance
+    or peak memory by more than tolerance only gives a warning, since both vary between
+    runs and machines.
+
+    :param results: The result lines keyed by run_key.
+    :type results: dict
+    :param baseline: The baseline result lines keyed by run_key.
+    :type baseline: dict
+    :param tolerance: The allowed relative growth of expansions and peak memory.
+    :type tolerance: float
+    :param time_tolerance: The allowed relative growth of time.
+    :type time_tolerance: float
+    :rtype: tuple
+    """
+    regressions = []
+    warnings = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        if result['status'] != base['status']:
+            regressions.append((key, 'status {} -> {}'.format(base['status'], result['status'])))
+            continue
+        if result['algorithm'] == 'a_star' and result['cost'] > base['cost']:
+            regressions.append((key, 'cost {} -> {}'.format(base['cost'], result['cost'])))
+        if result['expanded'] > base['expanded'] * (1 + tolerance):
+            regressions.append((key, 'expanded {} -> {}'.format(base['expanded'], result['expanded'])))
+        if result['time'] > max(base['time'], MIN_TIME) * (1 + time_tolerance):
+            warnings.append((key, 'time {:.3f}s -> {:.3f}s'.format(base['time'], result['time'])))
+        if result['peak_memory_kb'] > base['peak_memory_kb'] * (1 + tolerance):
+            warnings.append((key, 'peak memory {} KB -> {} KB'.format(base['peak_memory_kb'],
+                                                                      result['peak_memory_kb'])))
+    return regressions, warnings
+
+
+def display(results, baseline):
+    """
+    Prints a table of the runs next to their baseline numbers.
+    """
+    print('{:<40} {:>10} {:>6} {:>18} {:>18} {:>20}'.format(
+        'run', 'status', 'cost', 'expanded', 'time (s)', 'peak memory (KB)'))
+    for key, result in results.items():
+        base = baseline.get(key)
+
+        def cell(field, format='{}'):
+            value = format.format(result[field])
+            if base is None:
+                return value
+            return '{} ({})'.format(value, format.format(base[field]))
+
+        print('{:<40} {:>10} {:>6} {:>18} {:>18} {:>20}'.format(
+            key, result['status'], result['cost'], cell('expanded'), cell('time', '{:.3f}'),
+            cell('peak_memory_kb')))
+
+
+def load_baseline(filename=BASELINE_FILE):
+    if not os.path.exists(filename):
+        return {}
+    with open(filename) as file:
+        return json.load(file)
+
+
+def save_baseline(results, filename=BASELINE_FILE):
+    with open(filename, 'w') as file:
+        json.dump(results, file, indent=2, sort_keys=True)
+        file.write('\n')
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Benchmark the Sokoban searches against a stored baseline.")
+    parser.add_argument(
+        "--levels",
+        type=str,
+        required=False,
+        default=LEVEL_DIR,
+        help="The directory of benchmark levels."
+    )
+    parser.add_argument(
+        "--baseline",
+        type=str,
+        required=False,
+        default=BASELINE_FILE,
+        help="The baseline file the results are compared with."
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action='store_true',
+        help="Store the results as the new baseline instead of comparing with it."
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        required=False,
+        default=0.1,
+        help="The allowed relative growth of expansions (a regression) and peak memory (a warning)."
+    )
+    parser.add_argument(
+        "--time-tolerance",
+        type=float,
+        required=False,
+        default=0.25,
+        help="The allowed relative growth of time before a warning."
+    )
+    parser.add_argument(
+        "--time-limit",
+        type=float,
+        required=False,
+        default=120,
+        help="The time limit per run in seconds."
+    )
+    parser.add_argument(
+        "--memory-limit",
+        type=int,
+        required=False,
+        default=None,
+        help="The memory (address space) limit per run in MB."
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        required=False,
+        default=1,
+        help="Make every run this many times and keep the best time and peak memory."
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        required=False,
+        default=1,
+        help="The number of runs at once; more than one makes the times less reliable."
+    )
+    args = parser.parse_args()
+
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+    results = run_suite(args.levels, CONFIGS, args.time_limit, args.memory_limit, args.workers, args.repeat)
+    if args.update_baseline:
+        save_baseline(results, args.baseline)
+        display(results, {})
+        print('Baseline written to {}'.format(args.baseline))
+        sys.exit(0)
+
+    baseline = load_baseline(args.baseline)
+    display(results, baseline)
+    if not baseline:
+        print('No baseline in {}; run with --update-baseline to create one'.format(args.baseline))
+        sys.exit(0)
+    regressions, warnings = compare(results, baseline, args.tolerance, args.time_tolerance)
+    for key, reason in warnings:
+        print('WARNING {}: {}'.format(key, reason))
+    for key, reason in regressions:
+        print('REGRESSION {}: {}'.format(key, reason))
+    print('{} runs, {} regressions, {} warnings'.format(len(results), len(regressions), len(warnings)))
+    sys.exit(1 if regressions else 0)
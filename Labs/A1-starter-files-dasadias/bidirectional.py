@@ -0,0 +1,178 @@
+############################################################
+## CSC 384, Intro to AI, University of Toronto.
+## Assignment 1
+##
+## Bidirectional push/pull search: a forward search pushes boxes
+## from the initial board while a backward search pulls them out
+## of the goal configuration, until the two meet.
+############################################################
+
+from board import *
+from pushsearch import PushState, reachable, normalize, get_push_successors, expand_pushes
+
+
+def goal_boards(init_board):
+    """
+    Returns the normalized boards with every box on storage, one per region the robot
+    could be in at the end.
+
+    :param init_board: The initial board; it must have as many storage points as boxes.
+    :type init_board: Board
+    :rtype: List[Board]
+    """
+    level = init_board.level
+    boxes = tuple(sorted(level.storage))
+    box_set = set(boxes)
+    covered = bytearray(level.cells)
+    boards = []
+    for index, loc in enumerate(level.locations):
+        if covered[index] or loc in box_set or level.is_wall(loc[0], loc[1]):
+            continue
+        seen = reachable(level, loc, box_set)
+        for cell, in_region in enumerate(seen):
+            if in_region:
+                covered[cell] = 1
+        # loc is the first cell of its region, so the robot is already normalized
+        boards.append(Board.from_level(level, (loc,), boxes))
+    return boards
+
+
+def get_pull_successors(board, stats=None):
+    """
+    Return the normalized boards reached from the given one by pulling a single box, each
+    with the push that undoes the pull: (cell index of the pushed box, index into DIRECTIONS).
+
+    :param board: A normalized board with a single robot.
+    :type board: Board
+    :param stats: Statistics to count the expansion in.
+    :type stats: Optional[SearchStats]
+    :rtype: List[tuple]
+    """
+    successors = []
+    level = board.level
+    width = level.width
+    locations = level.locations
+    box_set = set(board.boxes)
+    seen = reachable(level, board.robots[0], box_set)
+
+    for box_index, box in enumerate(board.boxes):
+        for dir_index, (dir, dx, dy) in enumerate(DIRECTIONS):
+            # the robot stands next to the box on the dir side and steps further away
+            robot_x = box[0] + dx
+            robot_y = box[1] + dy
+            if level.is_wall(robot_x, robot_y) or not seen[robot_y * width + robot_x]:
+                continue
+            step_x = robot_x + dx
+            step_y = robot_y + dy
+            if level.is_wall(step_x, step_y) or locations[step_y * width + step_x] in box_set:
+                continue
+            target = locations[robot_y * width + robot_x]
+            boxes = board.boxes[:box_index] + (target,) + board.boxes[box_index+1:]
+            new_seen = reachable(level, locations[step_y * width + step_x], set(boxes))
+            new_board = Board.from_level(level, (locations[new_seen.find(1)],), boxes)
+            # pushing the box back from target, opposite to dir, undoes the pull
+            successors.append((new_board, (robot_y * width + robot_x, dir_index ^ 1)))
+
+    if stats is not None:
+        stats.expanded += 1
+        stats.generated += len(successors)
+    return successors
+
+
+def _chain(parents, key):
+    """
+    Returns the pushes recorded in parents from the root of the search to key, in order.
+    """
+    pushes = []
+    parent_key, push = parents[key]
+    while parent_key is not None:
+        pushes.append(push)
+        parent_key, push = parents[parent_key]
+    pushes.reverse()
+    return pushes
+
+
+def bidirectional_search(init_board, hfn=heuristic_zero, stats=None):
+    """
+    Run a bidirectional breadth first search over box pushes given an initial board with a
+    single robot: forward pushes from the initial board and backward pulls from the goal
+    configurations, one full layer at a time on the side with the smaller frontier.
+    Both sides are keyed by the compact key of the normalized board, so the search stops
+    as soon as they share a key, after the layer that found it.
+
+    The solution uses as few pushes as possible. The returned path has one state per
+    robot step, like a_star's.
+
+    :param init_board: The initial starting board.
+    :type init_board: Board
+    :param hfn: The heuristic function given to the states of the returned path.
+    :type hfn: Heuristic
+    :param stats: Statistics to fill in during the search.
+    :type stats: Optional[SearchStats]
+    :return: (the path to goal state, solution cost)
+    :rtype: List[State], int
+    """
+    if len(init_board.robots) != 1:
+        raise ValueError("bidirectional search needs a board with a single robot")
+    if len(init_board.boxes) != len(init_board.storage):
+        return ([], -1)
+
+    start = normalize(init_board)
+    # key -> (parent key, push from the key towards the parent on the backward side)
+    forward = {start.key(): (None, None)}
+    backward = {}
+    forward_frontier = [start]
+    backward_frontier = []
+    for board in goal_boards(init_board):
+        if board.key() not in backward:
+            backward[board.key()] = (None, None)
+            backward_frontier.append(board)
+
+    meet = None
+    if start.key() in backward:
+        meet = start.key()
+
+    while meet is None and forward_frontier and backward_frontier:
+        meetings = []
+        if len(forward_frontier) <= len(backward_frontier):
+            next_frontier = []
+            for board in forward_frontier:
+                state = PushState(board, heuristic_zero, 0, 0, None, 0)
+                for successor in get_push_successors(state, stats):
+                    new_board = successor.board
+                    key = successor.key
+                    if key in forward:
+                        continue
+                    forward[key] = (state.key, successor.push)
+                    next_frontier.append(new_board)
+                    if key in backward:
+                        meetings.append(key)
+            forward_frontier = next_frontier
+        else:
+            next_frontier = []
+            for board in backward_frontier:
+                parent_key = board.key()
+                for new_board, push in get_pull_successors(board, stats):
+                    key = new_board.key()
+                    if key in backward:
+                        continue
+                    backward[key] = (parent_key, push)
+                    next_frontier.append(new_board)
+                    if key in forward:
+                        meetings.append(key)
+            backward_frontier = next_frontier
+
+        if meetings:
+            meet = min(meetings, key=lambda key: len(_chain(forward, key)) + len(_chain(backward, key)))
+
+    if meet is None:
+        return ([], -1)
+
+    pushes = _chain(forward, meet)
+    parent_key, push = backward[meet]
+    while parent_key is not None:
+        pushes.append(push)
+        parent_key, push = backward[parent_key]
+
+    path = expand_pushes(init_board, pushes, hfn)
+    return (path, len(path)-1)
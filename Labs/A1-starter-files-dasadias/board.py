@@ -19,11 +19,154 @@ CHAR_BOX_IN_STORAGE = '*' # a box is at a storage point.
 CHAR_ROBOT = 'a'
 CHAR_ROBOT_IN_STORAGE = 'A' # a robot is at a storage point.
 
+# The moves a robot can make, as (direction, dx, dy).
+DIRECTIONS = (('up', 0, -1), ('down', 0, 1), ('left', -1, 0), ('right', 1, 0))
+
+# The bits of Level.tunnels: a box can only pass through the cell left/right, or up/down.
+TUNNEL_HORIZONTAL = 1
+TUNNEL_VERTICAL = 2
+
+class Level:
+    """
+    Represents the static part of a puzzle: its name, dimensions, storage points and walls.
+    A level is created once per puzzle and shared, unchanged, by every board of a search.
+    """
+
+    __slots__ = ('name', 'width', 'height', 'cells', 'storage', 'obstacles',
+                 'storage_set', 'obstacle_set', 'locations', 'walls', 'wall_stride', 'dead', 'tunnels')
+
+    def __init__(self, name: str, width: int, height: int, storage, obstacles):
+        """
+        Creates a Sokoban level.
+
+        :param name: the name of the Sokoban level
+        :type name: str
+        :param width: the width of the Sokoban level
+        :type width: int
+        :param height: the height of the Sokoban level
+        :type height: int
+        :param storage: positions for all the storage points.
+        :type storage: Iterable[tuple]
+        :param obstacles: locations of all of the obstacles (i.e. walls).
+        :type obstacles: Iterable[tuple]
+        """
+        set_attr = object.__setattr__
+        set_attr(self, 'name', name)
+        set_attr(self, 'width', width)
+        set_attr(self, 'height', height)
+        set_attr(self, 'cells', width * height)
+        set_attr(self, 'storage', tuple(storage))
+        set_attr(self, 'obstacles', tuple(obstacles))
+        set_attr(self, 'storage_set', frozenset(self.storage))
+        set_attr(self, 'obstacle_set', frozenset(self.obstacles))
+        # one shared (x, y) tuple per cell, so boards never allocate their own positions
+        set_attr(self, 'locations', tuple((x, y) for y in range(height) for x in range(width)))
+        # wall bitmap with a border of walls around the grid, indexed by (y + 1) * wall_stride + x + 1,
+        # so a step off any cell of the grid can be tested without a bounds check
+        walls = bytearray([1]) * ((width + 2) * (height + 2))
+        for y in range(height):
+            for x in range(width):
+                walls[(y + 1) * (width + 2) + x + 1] = (x, y) in self.obstacle_set
+        set_attr(self, 'walls', bytes(walls))
+        set_attr(self, 'wall_stride', width + 2)
+        set_attr(self, 'dead', self._dead_squares())
+        set_attr(self, 'tunnels', self._tunnels())
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Level is immutable")
+
+    def __reduce__(self):
+        # rebuild through __init__ when pickled, e.g. to send a board to another process
+        return (Level, (self.name, self.width, self.height, self.storage, self.obstacles))
+
+    def _dead_squares(self):
+        """
+        Returns a bitmap, indexed by cell, of the simple dead squares of the level:
+        the cells from which a box can never be pushed to any storage point.
+
+        A box can reach storage from exactly the cells it can be pulled to starting at a
+        storage point, where a pull from c to c + d needs c + d and c + 2d to be free of walls.
+        """
+        width = self.width
+        live = bytearray(self.cells)
+        frontier = []
+        for loc in self.storage_set:
+            if not self.is_wall(loc[0], loc[1]):
+                live[self.index(loc)] = 1
+                frontier.append(loc)
+
+        while frontier:
+            x, y = frontier.pop()
+            for dir, dx, dy in DIRECTIONS:
+                box_x = x + dx
+                box_y = y + dy
+                if (not self.is_wall(box_x, box_y) and not self.is_wall(box_x + dx, box_y + dy)
+                        and not live[box_y * width + box_x]):
+                    live[box_y * width + box_x] = 1
+                    frontier.append((box_x, box_y))
+
+        return bytes(1 - cell for cell in live)
+
+    def _tunnels(self):
+        """
+        Returns a bitmap, indexed by cell, of the tunnel squares of the level: cells without
+        storage that are one wide, with TUNNEL_HORIZONTAL set if there are walls above and below
+        (a box can only move left or right) and TUNNEL_VERTICAL if there are walls left and right.
+        """
+        tunnels = bytearray(self.cells)
+        for y in range(self.height):
+            for x in range(self.width):
+                if self.is_wall(x, y) or (x, y) in self.storage_set:
+                    continue
+                if self.is_wall(x, y - 1) and self.is_wall(x, y + 1):
+                    tunnels[y * self.width + x] |= TUNNEL_HORIZONTAL
+                if self.is_wall(x - 1, y) and self.is_wall(x + 1, y):
+                    tunnels[y * self.width + x] |= TUNNEL_VERTICAL
+        return bytes(tunnels)
+
+    def is_dead(self, loc):
+        """
+        Returns True if a box at loc can never be pushed to a storage point.
+        """
+        return self.dead[self.index(loc)] == 1
+
+    def index(self, loc):
+        """
+        Returns the cell index of the given (x, y) location.
+        """
+        return loc[1] * self.width + loc[0]
+
+    def is_wall(self, x, y):
+        """
+        Returns True if (x, y) is a wall or lies next to the grid.
+        """
+        return self.walls[(y + 1) * self.wall_stride + x + 1] == 1
+
+    def location(self, index):
+        """
+        Returns the shared (x, y) tuple of the given cell index.
+        """
+        return self.locations[index]
+
+    def __eq__(self, other):
+        if isinstance(other, Level):
+            return (self.width == other.width and self.height == other.height
+                    and self.storage_set == other.storage_set
+                    and self.obstacle_set == other.obstacle_set)
+        return False
+
+    def __hash__(self):
+        return hash((self.width, self.height, self.storage_set, self.obstacle_set))
+
+
 class Board:
     """
     Represents the puzzle board.
+    A board only holds the robot and box positions; everything else lives in its Level.
     """
 
+    __slots__ = ('level', 'robots', 'boxes', 'on_storage')
+
     def __init__(self, name: str, width: int, height: int, robots: object, boxes: object, storage: object,
                  obstacles: object) -> object:
         """
@@ -49,19 +192,96 @@ class Board:
         :type obstacles: List[tuple]
         :rtype: Board
         """
-        self.name = name
-        self.width = width
-        self.height = height
-        self.boxes = boxes
-        self.robots = robots
-        self.storage = storage
-        self.obstacles = obstacles
+        self.level = Level(name, width, height, storage, obstacles)
+        self.robots = tuple(robots)
+        self.boxes = tuple(boxes)
+        self.on_storage = self.count_on_storage()
+
+    @classmethod
+    def from_level(cls, level: Level, robots: tuple, boxes: tuple, on_storage=None):
+        """
+        Creates a board on an existing level without copying any of the static data.
+        Searches that know how a move changed the number of boxes on storage pass it in,
+        otherwise it is counted.
+
+        :param level: the level shared with the other boards of the search.
+        :type level: Level
+        :param robots: the robot positions.
+        :type robots: tuple
+        :param boxes: the box positions.
+        :type boxes: tuple
+        :param on_storage: the number of boxes on storage points.
+        :type on_storage: Optional[int]
+        :rtype: Board
+        """
+        board = cls.__new__(cls)
+        board.level = level
+        board.robots = robots
+        board.boxes = boxes
+        board.on_storage = board.count_on_storage() if on_storage is None else on_storage
+        return board
+
+    def count_on_storage(self):
+        '''
+        Return the number of boxes on storage points.
+        '''
+        storage_set = self.level.storage_set
+        return sum(1 for box in self.boxes if box in storage_set)
+
+    @property
+    def name(self):
+        return self.level.name
+
+    @property
+    def width(self):
+        return self.level.width
+
+    @property
+    def height(self):
+        return self.level.height
+
+    @property
+    def storage(self):
+        return self.level.storage
+
+    @property
+    def obstacles(self):
+        return self.level.obstacles
+
+    def key(self):
+        '''
+        Return a compact integer that UNIQUELY represents the robot and box positions of the board.
+
+        Every position is packed as its cell index (y * width + x) in base width * height.
+        Robots keep their order since each one is drawn with its own letter, while boxes are
+        interchangeable and therefore packed in sorted order.
+        '''
+        width = self.level.width
+        cells = self.level.cells
+        key = 0
+        for robot in self.robots:
+            key = key * cells + robot[1] * width + robot[0]
+        for box in sorted(self.boxes):
+            key = key * cells + box[1] * width + box[0]
+        return key
+
+    def box_key(self):
+        '''
+        Return a compact integer that UNIQUELY represents the box positions of the board,
+        packed like the box part of key().
+        '''
+        width = self.level.width
+        cells = self.level.cells
+        key = 0
+        for box in sorted(self.boxes):
+            key = key * cells + box[1] * width + box[0]
+        return key
 
     def __hash__(self):
         '''
         Return a data item that can be used as a dictionary key to UNIQUELY represent a board.
         '''
-        return hash(self.__str__())
+        return hash(self.key())
 
     def display(self):
         print(self.__str__())
@@ -70,31 +290,32 @@ class Board:
         '''
         Returns a string representation of a state that can be printed to stdout.
         '''
+        level = self.level
         map = []
-        for y in range(0, self.height):
+        for y in range(0, level.height):
             row = []
-            for x in range(0, self.width):
+            for x in range(0, level.width):
                 row += [' ']
             map += [row]
 
         # storage points are represented by dots.
-        for storage_point in self.storage:
+        for storage_point in level.storage:
             map[storage_point[1]][storage_point[0]] = CHAR_STORAGE
 
         # walls are represented by #.
-        for obstacle in self.obstacles:
+        for obstacle in level.obstacles:
             map[obstacle[1]][obstacle[0]] = CHAR_WALL
 
         # robots are represented by A
         for i, robot in enumerate(self.robots):
-            if robot in self.storage:
+            if robot in level.storage_set:
                 map[robot[1]][robot[0]] = chr(ord(CHAR_ROBOT_IN_STORAGE) + i)
             else:
                 map[robot[1]][robot[0]] = chr(ord(CHAR_ROBOT) + i)
 
         # boxes are represented by ? or * if they are at storage points.
         for box in self.boxes:
-            if box in self.storage:
+            if box in level.storage_set:
                 map[box[1]][box[0]] = CHAR_BOX_IN_STORAGE
             else:
                 map[box[1]][box[0]] = CHAR_BOX
@@ -110,7 +331,7 @@ class Board:
     # customized eq for object comparison.
     def __eq__(self, other):
         if isinstance(other, Board):
-            return self.__str__() == other.__str__()
+            return self.key() == other.key() and (self.level is other.level or self.level == other.level)
         return False
 
 
@@ -122,7 +343,9 @@ class State:
     heuristic function, f value, current depth and parent.
     """
 
-    def __init__(self, board: Board, hfn, f: int, depth: int, parent=None):
+    __slots__ = ('board', 'parent', 'hfn', 'f', 'h', 'depth', 'key', 'id', 'move', 'node')
+
+    def __init__(self, board: Board, hfn, f: int, depth: int, parent=None, h=None, move=None):
         """
         :param board: The board of the state.
         :type board: Board
@@ -135,14 +358,24 @@ class State:
         :type f: int
         :param depth: The depth of current state in the search tree. Depth of the root node is 0.
         :type depth: int
+        :param h: The heuristic value of the board, if it is already known. Computed with hfn otherwise.
+        :type h: Optional[int]
+        :param move: The code of the move from the parent (see searchgraph.move_code).
+        :type move: Optional[int]
         """
         self.board = board
         self.parent = parent
         self.hfn = hfn
         self.f = f
         self.depth = depth
+        if h is None:
+            h = hfn(board) if hfn is not None else 0
+        self.h = h
 
-        self.id = hash(board)  # The id for breaking ties.
+        self.key = board.key()  # The compact key used by the closed sets of the searches.
+        self.id = hash(self.key)  # The id for breaking ties.
+        self.move = move
+        self.node = None  # The index of the state in the SearchGraph of a search, once it has one.
 
     # customized lt for object comparison.
     def __lt__(self, other):
@@ -159,6 +392,55 @@ def heuristic_zero(board: Board):
 
     return 0
 
+# Heuristics may describe themselves so that searches can update them incrementally:
+#   box_cost(board, box) -- the heuristic is the sum of box_cost over the boxes of the board,
+#                           so a push only needs the moved box's contribution recomputed.
+#   boxes_only           -- the heuristic only looks at box positions, so a robot step keeps
+#                           the parent's value. Implied by box_cost.
+#   admissible           -- False if the heuristic can overestimate, so the searches that are
+#                           otherwise optimal may not be. Heuristics are taken to be admissible.
+heuristic_zero.box_cost = lambda board, box: 0
+
+
+def parse_board(name: str, width: int, height: int, lines) -> Board:
+    """
+    Builds a Board from the rows of a puzzle.
+
+    :param name: The name of the puzzle.
+    :type name: str
+    :param width: The width of the puzzle.
+    :type width: int
+    :param height: The height of the puzzle.
+    :type height: int
+    :param lines: The rows of the puzzle, top to bottom.
+    :type lines: Iterable[str]
+    :rtype: Board
+    """
+    robots = []
+    boxes = []
+    storage = []
+    obstacles = []
+
+    for row, line in enumerate(lines):
+        for col in range(len(line)):
+            char = line[col]
+            if char == CHAR_WALL:
+                obstacles.append((col, row))
+            elif char == CHAR_BOX_IN_STORAGE:
+                boxes.append((col, row))
+                storage.append((col, row))
+            elif char == CHAR_BOX:
+                boxes.append((col, row))
+            elif char == CHAR_STORAGE:
+                storage.append((col, row))
+            elif char.isalpha() and char.isupper():
+                robots.append((col, row))
+                storage.append((col, row))
+            elif char.isalpha() and char.islower():
+                robots.append((col, row))
+
+    return Board(name, width, height, robots, boxes, storage, obstacles)
+
 
 def read_from_file(filename: str) -> Board:
     """
@@ -172,42 +454,41 @@ def read_from_file(filename: str) -> Board:
     """
 
     puzzle_file = open(filename, "r")
-    counter = 0
-    width = -1
-    height = -1
-    name = ""
-
-    row = 0
-    board = Board("", -1, -1, [], [], [], [])
-
-    for line in puzzle_file:
-
-        if counter == 0: # first line has name of puzzle
-            board.name = line.strip()
-        elif counter == 1: # second line has width
-            board.width = int(line)
-        elif counter == 2: # third line has height
-            board.height = int(line)
-        else: # the following lines describe cars
-            for col in range(len(line)):
-                char = line[col]
-                if char == CHAR_WALL:
-                    board.obstacles.append((col, row))
-                elif char == CHAR_BOX_IN_STORAGE:
-                    board.boxes.append((col, row))
-                    board.storage.append((col, row))
-                elif char == CHAR_BOX:
-                    board.boxes.append((col, row))
-                elif char == CHAR_STORAGE:
-                    board.storage.append((col, row))
-                elif char.isalpha() and char.isupper():
-                    board.robots.append((col, row))
-                    board.storage.append((col, row))
-                elif char.isalpha() and char.islower():
-                    board.robots.append((col, row))
-            row += 1
-
-        counter += 1
+    lines = puzzle_file.readlines()
+    puzzle_file.close()
+
+    # first line has name of puzzle, second line has width, third line has height
+    # and the following lines describe the board
+    return parse_board(lines[0].strip(), int(lines[1]), int(lines[2]), lines[3:])
+
 
+def read_all_from_file(filename: str) -> List[Board]:
+    """
+    Reads in every puzzle of a file holding several of them one after the other,
+    each in the format read by read_from_file and exactly as many rows high as its
+    height says. Blank lines between puzzles are skipped.
+
+    :param filename: The name of the given file.
+    :type filename: str
+    :return: the loaded Boards, in file order
+    :rtype: List[Board]
+    """
+
+    puzzle_file = open(filename, "r")
+    lines = puzzle_file.readlines()
     puzzle_file.close()
-    return board
\ No newline at end of file
+
+    boards = []
+    counter = 0
+    while counter < len(lines):
+        if not lines[counter].strip():
+            counter += 1
+            continue
+        name = lines[counter].strip()
+        width = int(lines[counter + 1])
+        height = int(lines[counter + 2])
+        rows = lines[counter + 3:counter + 3 + height]
+        boards.append(parse_board(name, width, height, rows))
+        counter += 3 + height
+
+    return boards
@@ -0,0 +1,106 @@
+############################################################
+## CSC 384, Intro to AI, University of Toronto.
+## Assignment 1
+##
+## Dynamic deadlock detection: after a push, checks whether the
+## pushed box is stuck for good together with its neighbours.
+############################################################
+
+from board import *
+
+
+def is_deadlock(level, box_set, box):
+    """
+    Returns True if the box that was just pushed to box is part of a deadlock,
+    i.e. of a group of boxes that can never move again while one of them is off storage.
+
+    Only the neighbourhood of the pushed box is examined: the four 2x2 squares that
+    contain it, and the boxes it is frozen against.
+
+    :param level: The level of the board.
+    :type level: Level
+    :param box_set: The positions of all the boxes after the push.
+    :type box_set: Set[tuple]
+    :param box: The new position of the pushed box.
+    :type box: tuple
+    :rtype: bool
+    """
+    return is_square_deadlock(level, box_set, box) or is_freeze_deadlock(level, box_set, box)
+
+
+def is_square_deadlock(level, box_set, box):
+    """
+    Returns True if box fills a 2x2 square of walls and boxes with a box off storage.
+
+    :param level: The level of the board.
+    :type level: Level
+    :param box_set: The positions of all the boxes.
+    :type box_set: Set[tuple]
+    :param box: The position of the box to check.
+    :type box: tuple
+    :rtype: bool
+    """
+    x, y = box
+    for left in (x - 1, x):
+        for top in (y - 1, y):
+            off_storage = False
+            for cell in ((left, top), (left + 1, top), (left, top + 1), (left + 1, top + 1)):
+                if cell in box_set:
+                    if cell not in level.storage_set:
+                        off_storage = True
+                elif not level.is_wall(cell[0], cell[1]):
+                    break
+            else:
+                if off_storage:
+                    return True
+    return False
+
+
+def is_freeze_deadlock(level, box_set, box):
+    """
+    Returns True if box is frozen, i.e. can be pushed along neither axis,
+    and it or one of the boxes freezing it is off storage.
+
+    :param level: The level of the board.
+    :type level: Level
+    :param box_set: The positions of all the boxes.
+    :type box_set: Set[tuple]
+    :param box: The position of the box to check.
+    :type box: tuple
+    :rtype: bool
+    """
+    frozen = []
+    if not _is_frozen(level, box_set, box, set(), frozen):
+        return False
+    for cell in frozen:
+        if cell not in level.storage_set:
+            return True
+    return False
+
+
+def _is_frozen(level, box_set, box, checking, frozen):
+    """
+    Returns True if box can't move along either axis. Boxes that are being checked
+    further up the recursion are treated as walls, which is what makes a chain of
+    boxes blocking each other frozen. Frozen boxes are appended to frozen.
+    """
+    checking.add(box)
+    x, y = box
+    for dx, dy in ((1, 0), (0, 1)):
+        before = (x - dx, y - dy)
+        after = (x + dx, y + dy)
+        if (level.is_wall(before[0], before[1]) or level.is_wall(after[0], after[1])
+                or before in checking or after in checking):
+            # a wall on either side stops any push along this axis
+            continue
+        if level.is_dead(before) and level.is_dead(after):
+            # the box may move, but only onto a dead square
+            continue
+        if ((before in box_set and _is_frozen(level, box_set, before, checking, frozen))
+                or (after in box_set and _is_frozen(level, box_set, after, checking, frozen))):
+            continue
+        checking.discard(box)
+        return False
+
+    frozen.append(box)
+    return True
@@ -0,0 +1,207 @@
+############################################################
+## CSC 384, Intro to AI, University of Toronto.
+## Assignment 1
+##
+## Random level generator: builds a room, puts the boxes on
+## storage and plays backwards, pulling boxes away from storage,
+## so every generated level is solvable by construction.
+############################################################
+
+import argparse
+import random
+
+from board import *
+
+# Interior squares that are walls, on average.
+DEFAULT_WALL_DENSITY = 0.15
+
+# Reverse moves played per box.
+DEFAULT_PULLS_PER_BOX = 60
+
+# Levels tried before giving up on the requested size.
+MAX_ATTEMPTS = 1000
+
+
+def _room(rng, width, height, wall_density):
+    """
+    Returns the walls and the floor of a random room: a border of walls, random walls
+    inside, and only the largest connected area of floor kept.
+    """
+    walls = set()
+    for y in range(height):
+        for x in range(width):
+            if x in (0, width - 1) or y in (0, height - 1) or rng.random() < wall_density:
+                walls.add((x, y))
+
+    floor = []
+    seen = set(walls)
+    for y in range(height):
+        for x in range(width):
+            if (x, y) in seen:
+                continue
+            area = [(x, y)]
+            seen.add((x, y))
+            for cx, cy in area:
+                for dir, dx, dy in DIRECTIONS:
+                    loc = (cx + dx, cy + dy)
+                    if loc not in seen:
+                        seen.add(loc)
+                        area.append(loc)
+            if len(area) > len(floor):
+                floor = area
+
+    floor_set = set(floor)
+    walls = [(x, y) for y in range(height) for x in range(width) if (x, y) not in floor_set]
+    return walls, floor
+
+
+def _play_backwards(rng, walls, robots, boxes, moves):
+    """
+    Makes random reverse moves: a robot steps to a free square and, if a box is on
+    the square it left the other way, may pull it along. Undoing these moves in
+    reverse order is a sequence of legal forward moves and pushes.
+    """
+    wall_set = set(walls)
+    for move in range(moves):
+        i = rng.randrange(len(robots))
+        robot = robots[i]
+        dir, dx, dy = rng.choice(DIRECTIONS)
+        new_loc = (robot[0] + dx, robot[1] + dy)
+        if new_loc in wall_set or new_loc in boxes or new_loc in robots:
+            continue
+        behind = (robot[0] - dx, robot[1] - dy)
+        if behind in boxes and rng.random() < 0.8:
+            boxes[boxes.index(behind)] = robot
+        robots[i] = new_loc
+
+
+def generate_level(width, height, boxes, robots=1, seed=None, wall_density=DEFAULT_WALL_DENSITY,
+                   pulls_per_box=DEFAULT_PULLS_PER_BOX, name=None):
+    """
+    Generates a random level that is solvable by construction.
+
+    :param width: The width of the level, walls included.
+    :type width: int
+    :param height: The height of the level, walls included.
+    :type height: int
+    :param boxes: The number of boxes (and storage points).
+    :type boxes: int
+    :param robots: The number of robots.
+    :type robots: int
+    :param seed: The seed of the random generator; the same seed gives the same level.
+    :type seed: Optional[int]
+    :param wall_density: The chance that an interior square is a wall.
+    :type wall_density: float
+    :param pulls_per_box: The reverse moves played per box.
+    :type pulls_per_box: int
+    :param name: The name of the level.
+    :type name: Optional[str]
+    :return: the initial board of the level
+    :rtype: Board
+    """
+    if robots < 1 or robots > 26:
+        raise ValueError('a level has between 1 and 26 robots')
+    rng = random.Random(seed)
+    if name is None:
+        name = 'Generated {}x{} {} boxes {} robots seed {}'.format(width, height, boxes, robots, seed)
+
+    for attempt in range(MAX_ATTEMPTS):
+        walls, floor = _room(rng, width, height, wall_density)
+        if len(floor) < boxes + robots + 1:
+            continue
+        rng.shuffle(floor)
+        storage = floor[:boxes]
+        box_locs = list(storage)
+        robot_locs = floor[boxes:boxes + robots]
+        _play_backwards(rng, walls, robot_locs, box_locs, boxes * pulls_per_box)
+        if boxes and set(box_locs) == set(storage):
+            continue
+        return Board(name, width, height, robot_locs, box_locs, storage, walls)
+
+    raise ValueError('could not generate a {}x{} level with {} boxes and {} robots'.format(
+        width, height, boxes, robots))
+
+
+def format_level(board):
+    """
+    Returns the board in the format read by read_from_file.
+
+    :param board: The board.
+    :type board: Board
+    :rtype: str
+    """
+    return '{}\n{}\n{}\n{}'.format(board.name, board.width, board.height, board)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Generate random solvable Sokoban levels.")
+    parser.add_argument(
+        "--outputfile",
+        type=str,
+        required=True,
+        help="The file the levels are written to, one after the other."
+    )
+    parser.add_argument(
+        "--width",
+        type=int,
+        required=True,
+        help="The width of the levels, walls included."
+    )
+    parser.add_argument(
+        "--height",
+        type=int,
+        required=True,
+        help="The height of the levels, walls included."
+    )
+    parser.add_argument(
+        "--boxes",
+        type=int,
+        required=True,
+        help="The number of boxes."
+    )
+    parser.add_argument(
+        "--robots",
+        type=int,
+        required=False,
+        default=1,
+        help="The number of robots."
+    )
+    parser.add_argument(
+        "--count",
+        type=int,
+        required=False,
+        default=1,
+        help="The number of levels; level i uses seed + i."
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        required=False,
+        default=0,
+        help="The seed of the first level."
+    )
+    parser.add_argument(
+        "--wall-density",
+        type=float,
+        required=False,
+        default=DEFAULT_WALL_DENSITY,
+        help="The chance that an interior square is a wall."
+    )
+    parser.add_argument(
+        "--pulls-per-box",
+        type=int,
+        required=False,
+        default=DEFAULT_PULLS_PER_BOX,
+        help="The reverse moves played per box; more moves scatter the boxes further."
+    )
+    args = parser.parse_args()
+
+    outputfile = open(args.outputfile, "w")
+    for i in range(args.count):
+        board = generate_level(args.width, args.height, args.boxes, args.robots, args.seed + i,
+                               args.wall_density, args.pulls_per_box)
+        if i:
+            print(file=outputfile)
+        outputfile.write(format_level(board))
+    outputfile.close()
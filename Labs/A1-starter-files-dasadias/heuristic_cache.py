@@ -0,0 +1,84 @@
+############################################################
+## CSC 384, Intro to AI, University of Toronto.
+## Assignment 1
+##
+## Bounded memo cache in front of a heuristic that only depends
+## on the box positions, keyed by the box part of the state key.
+############################################################
+
+from collections import OrderedDict
+
+# Number of box layouts kept by default.
+DEFAULT_HEURISTIC_CACHE_SIZE = 100000
+
+
+def is_boxes_only(hfn):
+    """
+    Returns True if the heuristic declares that it only depends on the box positions,
+    through a box_cost or boxes_only attribute.
+
+    :param hfn: The heuristic function.
+    :type hfn: Heuristic
+    :rtype: bool
+    """
+    return getattr(hfn, 'box_cost', None) is not None or getattr(hfn, 'boxes_only', False)
+
+
+class HeuristicCache:
+    """
+    A heuristic that remembers the values of the last capacity box layouts it was
+    called on, evicting the least recently used one when full. It can only wrap a
+    heuristic that doesn't look at the robots, since boards that differ in robot
+    positions only share an entry. Entries are not tied to a level, so use one cache per level.
+    """
+
+    boxes_only = True
+
+    def __init__(self, hfn, capacity=DEFAULT_HEURISTIC_CACHE_SIZE, stats=None):
+        """
+        :param hfn: The heuristic function; it must be boxes-only (see is_boxes_only).
+        :type hfn: Heuristic
+        :param capacity: The maximum number of box layouts kept.
+        :type capacity: int
+        :param stats: Statistics to count the hits and misses in.
+        :type stats: Optional[SearchStats]
+        """
+        if capacity < 1:
+            raise ValueError("a heuristic cache needs room for at least one box layout")
+        if not is_boxes_only(hfn):
+            raise ValueError("only a heuristic that depends on the boxes alone can be cached")
+        self.hfn = hfn
+        self.capacity = capacity
+        self.stats = stats
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        box_cost = getattr(hfn, 'box_cost', None)
+        if box_cost is not None:
+            # incremental updates in get_successors go straight to the heuristic
+            self.box_cost = box_cost
+
+    def __call__(self, board):
+        entries = self.entries
+        key = board.box_key()
+        value = entries.get(key)
+        if value is not None:
+            entries.move_to_end(key)
+            self.hits += 1
+            if self.stats is not None:
+                self.stats.heuristic_cache_hits += 1
+            return value
+        value = self.hfn(board)
+        entries[key] = value
+        if len(entries) > self.capacity:
+            entries.popitem(last=False)
+        self.misses += 1
+        if self.stats is not None:
+            self.stats.heuristic_cache_misses += 1
+        return value
+
+    def clear(self):
+        self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,147 @@
+############################################################
+## CSC 384, Intro to AI, University of Toronto.
+## Assignment 1
+##
+## Assignment heuristic: every box is matched to its own storage
+## point so that the sum of push distances is minimal.
+############################################################
+
+from functools import lru_cache
+
+from board import *
+
+# Distance used for a box that can never reach a storage point.
+UNREACHABLE = 2**31
+
+
+@lru_cache(maxsize=16)
+def push_distance_tables(level):
+    """
+    Returns, for every storage point of the level, a table indexed by cell with the least
+    number of pushes needed to move a box from that cell to the storage point, ignoring
+    the other boxes. Cells the box can't be pushed from hold UNREACHABLE.
+
+    The tables are built once per level by pulling a box away from each storage point.
+
+    :param level: The level.
+    :type level: Level
+    :return: one table per storage point, in the order of level.storage.
+    :rtype: List[List[int]]
+    """
+    tables = []
+    width = level.width
+    for goal in level.storage:
+        table = [UNREACHABLE] * level.cells
+        if level.is_wall(goal[0], goal[1]):
+            tables.append(table)
+            continue
+        table[level.index(goal)] = 0
+        frontier = [goal]
+        # breadth first, one layer of pulls at a time
+        while frontier:
+            next_frontier = []
+            for x, y in frontier:
+                dist = table[y * width + x] + 1
+                for dir, dx, dy in DIRECTIONS:
+                    box_x = x + dx
+                    box_y = y + dy
+                    if (not level.is_wall(box_x, box_y) and not level.is_wall(box_x + dx, box_y + dy)
+                            and table[box_y * width + box_x] == UNREACHABLE):
+                        table[box_y * width + box_x] = dist
+                        next_frontier.append((box_x, box_y))
+            frontier = next_frontier
+        tables.append(table)
+    return tables
+
+
+def min_cost_assignment(cost):
+    """
+    Returns the least total cost of assigning every row of the cost matrix to its own
+    column (the Hungarian algorithm, O(rows^2 * columns)).
+
+    :param cost: a matrix with no more rows than columns.
+    :type cost: List[List[int]]
+    :rtype: int
+    """
+    rows = len(cost)
+    if rows == 0:
+        return 0
+    columns = len(cost[0])
+    # potentials and matching, 1-indexed with column 0 as the free root
+    u = [0] * (rows + 1)
+    v = [0] * (columns + 1)
+    match = [0] * (columns + 1)
+    way = [0] * (columns + 1)
+
+    for row in range(1, rows + 1):
+        match[0] = row
+        column = 0
+        min_slack = [float('inf')] * (columns + 1)
+        used = [False] * (columns + 1)
+        while True:
+            used[column] = True
+            current_row = match[column]
+            cost_row = cost[current_row - 1]
+            delta = float('inf')
+            next_column = 0
+            for j in range(1, columns + 1):
+                if not used[j]:
+                    slack = cost_row[j - 1] - u[current_row] - v[j]
+                    if slack < min_slack[j]:
+                        min_slack[j] = slack
+                        way[j] = column
+                    if min_slack[j] < delta:
+                        delta = min_slack[j]
+                        next_column = j
+            for j in range(columns + 1):
+                if used[j]:
+                    u[match[j]] += delta
+                    v[j] -= delta
+                else:
+                    min_slack[j] -= delta
+            column = next_column
+            if match[column] == 0:
+                break
+        # augment along the alternating path
+        while column:
+            previous = way[column]
+            match[column] = match[previous]
+            column = previous
+
+    total = 0
+    for j in range(1, columns + 1):
+        if match[j]:
+            total += cost[match[j] - 1][j - 1]
+    return total
+
+
+def heuristic_matching(board):
+    """
+    Returns the least total number of pushes needed to move the boxes to distinct
+    storage points, each box on its own ignoring the others.
+
+    Push distances respect the walls and come from tables built once per level,
+    so an evaluation only builds the box by storage cost matrix and matches it.
+
+    :param board: The current board.
+    :type board: Board
+    :return: The heuristic value.
+    :rtype: int
+    """
+    level = board.level
+    if len(board.boxes) > len(level.storage):
+        return UNREACHABLE
+    tables = push_distance_tables(level)
+    width = level.width
+    cost = []
+    for box in board.boxes:
+        index = box[1] * width + box[0]
+        row = [table[index] for table in tables]
+        if min(row) == UNREACHABLE:
+            return UNREACHABLE
+        cost.append(row)
+
+    total = min_cost_assignment(cost)
+    return total if total < UNREACHABLE else UNREACHABLE
+
+heuristic_matching.boxes_only = True
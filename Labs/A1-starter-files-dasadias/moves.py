@@ -0,0 +1,149 @@
+############################################################
+## CSC 384, Intro to AI, University of Toronto.
+## Assignment 1
+##
+## Compact solution format: one character per robot step, LURD
+## style, in upper case when the step pushes a box. With several
+## robots every step is preceded by the letter of its robot.
+## The replayer rebuilds the boards of a solution on demand.
+############################################################
+
+import argparse
+
+from board import *
+
+# The move characters, in the order of DIRECTIONS.
+MOVE_CHARS = 'udlr'
+
+
+def path_to_moves(path):
+    """
+    Returns the move string of a path of single robot steps.
+
+    :param path: The states of a solution, as returned by the searches.
+    :type path: List[State]
+    :rtype: str
+    """
+    moves = []
+    for state, next_state in zip(path, path[1:]):
+        board = state.board
+        next_board = next_state.board
+        for i, (robot, next_robot) in enumerate(zip(board.robots, next_board.robots)):
+            if robot == next_robot:
+                continue
+            for dir_index, (dir, dx, dy) in enumerate(DIRECTIONS):
+                if (robot[0] + dx, robot[1] + dy) == next_robot:
+                    break
+            else:
+                raise ValueError("robot {} doesn't move by a single step".format(i))
+            char = MOVE_CHARS[dir_index]
+            if board.boxes != next_board.boxes:
+                char = char.upper()
+            if len(board.robots) > 1:
+                char = chr(ord(CHAR_ROBOT) + i) + char
+            moves.append(char)
+            break
+    return ''.join(moves)
+
+
+def parse_moves(moves, robots):
+    """
+    Returns the (robot index, index into DIRECTIONS, pushes) of every step of a move string.
+
+    :param moves: The move string.
+    :type moves: str
+    :param robots: The number of robots on the board.
+    :type robots: int
+    :rtype: List[tuple]
+    """
+    moves = moves.strip()
+    steps = []
+    position = 0
+    while position < len(moves):
+        robot = 0
+        if robots > 1:
+            robot = ord(moves[position]) - ord(CHAR_ROBOT)
+            position += 1
+            if not 0 <= robot < robots or position == len(moves):
+                raise ValueError("bad robot letter in move string at {}".format(position - 1))
+        char = moves[position]
+        if char.lower() not in MOVE_CHARS:
+            raise ValueError("bad move {!r} in move string at {}".format(char, position))
+        steps.append((robot, MOVE_CHARS.index(char.lower()), char.isupper()))
+        position += 1
+    return steps
+
+
+def replay(board, moves):
+    """
+    Plays a move string on the board and returns every board along the way,
+    starting with the given one. Raises ValueError on a move that can't be made
+    or whose case doesn't match whether it pushes a box.
+
+    :param board: The initial board.
+    :type board: Board
+    :param moves: The move string.
+    :type moves: str
+    :rtype: List[Board]
+    """
+    level = board.level
+    boards = [board]
+    for step, (robot_index, dir_index, pushes) in enumerate(parse_moves(moves, len(board.robots))):
+        dir, dx, dy = DIRECTIONS[dir_index]
+        robot = board.robots[robot_index]
+        new_loc = (robot[0] + dx, robot[1] + dy)
+        if level.is_wall(new_loc[0], new_loc[1]) or new_loc in board.robots:
+            raise ValueError("step {} walks into a wall or a robot".format(step + 1))
+        new_loc = level.location(level.index(new_loc))
+        boxes = board.boxes
+        if new_loc in boxes:
+            box_loc = (new_loc[0] + dx, new_loc[1] + dy)
+            if level.is_wall(box_loc[0], box_loc[1]) or box_loc in boxes or box_loc in board.robots:
+                raise ValueError("step {} pushes a box that can't move".format(step + 1))
+            box_index = boxes.index(new_loc)
+            boxes = boxes[:box_index] + (level.location(level.index(box_loc)),) + boxes[box_index+1:]
+        if (boxes is not board.boxes) != pushes:
+            raise ValueError("step {} is marked as a {}".format(step + 1, 'push' if pushes else 'walk'))
+        robots = board.robots[:robot_index] + (new_loc,) + board.robots[robot_index+1:]
+        board = Board.from_level(level, robots, boxes)
+        boards.append(board)
+    return boards
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Replay a move string on a puzzle.")
+    parser.add_argument(
+        "--inputfile",
+        type=str,
+        required=True,
+        help="The file that contains the puzzle."
+    )
+    parser.add_argument(
+        "--solutionfile",
+        type=str,
+        required=True,
+        help="The file that contains the move string of the solution."
+    )
+    parser.add_argument(
+        "--step",
+        type=int,
+        required=False,
+        default=None,
+        help="Only print the board after this many steps."
+    )
+    args = parser.parse_args()
+
+    board = read_from_file(args.inputfile)
+    with open(args.solutionfile) as f:
+        boards = replay(board, f.read())
+
+    if args.step is not None:
+        if not 0 <= args.step < len(boards):
+            parser.error("--step must be between 0 and {}, the number of steps of the solution".format(
+                len(boards) - 1))
+        boards[args.step].display()
+    else:
+        for counter, board in enumerate(boards):
+            print(counter + 1)
+            board.display()
@@ -0,0 +1,370 @@
+############################################################
+## CSC 384, Intro to AI, University of Toronto.
+## Assignment 1
+##
+## Hash-distributed parallel A* (HDA*): every state is owned by the
+## worker process its key hashes to, and workers send each other
+## the successors they generate in batches.
+############################################################
+
+import argparse
+import multiprocessing
+import queue
+import time
+from heapq import heappush, heappop
+
+from board import *
+from searchgraph import intermediate_boards
+from solve import is_goal, get_successors, HEURISTICS
+from stats import SearchStats
+
+# Number of successors a worker collects for another worker before sending them.
+DEFAULT_BATCH_SIZE = 64
+
+# Number of expansions between two looks at the inbox.
+EXPANSIONS_PER_POLL = 32
+
+# Seconds the coordinator waits for a message before checking that the workers are alive.
+POLL_INTERVAL = 1.0
+
+
+def owner(key, workers):
+    """
+    Returns the worker that owns the state with the given key. The key is mixed first
+    so that states that differ in a single cell spread over all the workers.
+
+    :param key: The compact key of a state.
+    :type key: int
+    :param workers: The number of workers.
+    :type workers: int
+    :rtype: int
+    """
+    return (((key % 18446744073709551557) * 11400714819323198485) >> 32) % workers
+
+
+def _worker(index, level, hfn, inboxes, outbox, batch_size):
+    """
+    The loop of one worker. Messages in its inbox are:
+      ('states', [(key, g, h, robots, boxes, parent key), ...]) -- states it owns
+      ('incumbent', cost) -- the cost of the best solution found so far
+      ('probe', wave) -- asks for a status report
+      ('trace', key) -- asks for the parent and positions of a state
+      ('stop',)
+    It reports on the outbox with ('status', index, idle, sent, received, counts, wave),
+    ('solution', cost, key) and ('node', key, parent key, robots, boxes), where counts are
+    its (expanded, generated, dead square prunes, deadlock prunes) so far.
+    """
+    inbox = inboxes[index]
+    workers = len(inboxes)
+    # key -> [g, parent key, robots, boxes, closed]
+    nodes = {}
+    open_heap = []
+    counter = 0
+    incumbent = float('inf')
+    sent = 0
+    received = 0
+    buffers = [[] for i in range(workers)]
+    last_status = None
+    stats = SearchStats()
+
+    def insert(key, g, h, robots, boxes, parent_key):
+        nonlocal counter
+        node = nodes.get(key)
+        if node is not None and node[0] <= g:
+            return
+        # new or reached more cheaply: (re)open it
+        nodes[key] = [g, parent_key, robots, boxes, False]
+        counter += 1
+        heappush(open_heap, (g + h, h, counter, key, g))
+
+    def flush(target):
+        nonlocal sent
+        if buffers[target]:
+            inboxes[target].put(('states', buffers[target]))
+            buffers[target] = []
+            sent += 1
+
+    def handle(message):
+        nonlocal received, incumbent, last_status
+        kind = message[0]
+        if kind == 'states':
+            received += 1
+            for entry in message[1]:
+                insert(*entry)
+        elif kind == 'incumbent':
+            incumbent = min(incumbent, message[1])
+        elif kind == 'probe':
+            outbox.put(('status', index, is_idle(), sent, received, counts(), message[1]))
+        elif kind == 'trace':
+            node = nodes[message[1]]
+            outbox.put(('node', message[1], node[1], node[2], node[3]))
+        elif kind == 'stop':
+            return False
+        return True
+
+    def counts():
+        return (stats.expanded, stats.generated, stats.dead_square_prunes, stats.deadlock_prunes)
+
+    def is_idle():
+        # stale entries on top of the heap don't count as work
+        while open_heap:
+            f, h, order, key, g = open_heap[0]
+            node = nodes[key]
+            if node[4] or node[0] != g:
+                heappop(open_heap)
+                continue
+            return f >= incumbent
+        return True
+
+    while True:
+        # take in everything that has arrived
+        try:
+            while True:
+                if not handle(inbox.get_nowait()):
+                    return
+        except queue.Empty:
+            pass
+
+        if is_idle():
+            for target in range(workers):
+                flush(target)
+            status = (True, sent, received)
+            if status != last_status:
+                outbox.put(('status', index, True, sent, received, counts(), None))
+                last_status = status
+            if not handle(inbox.get()):
+                return
+            continue
+        last_status = None
+
+        for i in range(EXPANSIONS_PER_POLL):
+            if is_idle():
+                break
+            f, h, order, key, g = heappop(open_heap)
+            node = nodes[key]
+            node[4] = True
+            state = State(Board.from_level(level, node[2], node[3]), hfn, f, g, None, h)
+            if is_goal(state):
+                if g < incumbent:
+                    incumbent = g
+                    outbox.put(('solution', g, key))
+                continue
+
+            for successor in get_successors(state, stats):
+                target = owner(successor.key, workers)
+                entry = (successor.key, successor.depth, successor.h,
+                         successor.board.robots, successor.board.boxes, key)
+                if target == index:
+                    insert(*entry)
+                else:
+                    buffers[target].append(entry)
+                    if len(buffers[target]) >= batch_size:
+                        flush(target)
+
+
+def _receive(outbox, processes):
+    """
+    Returns the next message from the workers. Raises RuntimeError if a worker has
+    died, since the search can't finish without it.
+    """
+    while True:
+        try:
+            return outbox.get(timeout=POLL_INTERVAL)
+        except queue.Empty:
+            for index, process in enumerate(processes):
+                if not process.is_alive():
+                    raise RuntimeError("parallel A* worker {} exited with code {}".format(index, process.exitcode))
+
+
+def parallel_a_star(init_board, hfn, workers=None, batch_size=DEFAULT_BATCH_SIZE, stats=None):
+    """
+    Run hash-distributed parallel A* given an initial board and a heuristic function.
+
+    Each worker process runs A* over the states it owns and sends the successors owned by
+    others to them in batches. Workers only expand states whose f is below the cost of the
+    best solution found so far. The search ends once every worker is out of such states and
+    no batch is in flight, which is confirmed by two consecutive rounds of status reports with
+    equal message counts. With an admissible heuristic the solution is then optimal.
+
+    If the function finds a goal state, it returns a list of states representing
+    the path from the initial state to the goal state in order and the cost of
+    the solution found.
+    Otherwise, it returns am empty list and -1.
+
+    :param init_board: The initial starting board.
+    :type init_board: Board
+    :param hfn: The heuristic function; it must be picklable, e.g. one of HEURISTICS.
+    :type hfn: Heuristic
+    :param workers: The number of worker processes; one per core by default.
+    :type workers: Optional[int]
+    :param batch_size: The number of successors sent to another worker at once.
+    :type batch_size: int
+    :param stats: Statistics to fill in during the search.
+    :type stats: Optional[SearchStats]
+    :return: (the path to goal state, solution cost)
+    :rtype: List[State], int
+    """
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    level = init_board.level
+    inboxes = [multiprocessing.Queue() for i in range(workers)]
+    outbox = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=_worker, args=(i, level, hfn, inboxes, outbox, batch_size),
+                                         daemon=True)
+                 for i in range(workers)]
+    for process in processes:
+        process.start()
+
+    init_state = State(init_board, hfn, 0, 0, None)
+    inboxes[owner(init_state.key, workers)].put(
+        ('states', [(init_state.key, 0, init_state.h, init_board.robots, init_board.boxes, None)]))
+    coordinator_sent = 1
+
+    incumbent = float('inf')
+    goal_key = None
+    statuses = [None] * workers
+    wave = 0
+    wave_totals = None
+    wave_replies = {}
+
+    try:
+        while True:
+            message = _receive(outbox, processes)
+            if message[0] == 'solution':
+                if message[1] < incumbent:
+                    incumbent, goal_key = message[1], message[2]
+                    for inbox in inboxes:
+                        inbox.put(('incumbent', incumbent))
+                continue
+
+            kind, index, idle, sent, received, counts, reply_wave = message
+            statuses[index] = (idle, sent, received, counts)
+            if reply_wave is not None:
+                if reply_wave == wave:
+                    wave_replies[index] = (idle, sent, received)
+                if len(wave_replies) < workers:
+                    continue
+                # second round: nothing may have moved since the first one
+                replies = list(wave_replies.values())
+                wave_replies = {}
+                totals = (sum(reply[1] for reply in replies) + coordinator_sent,
+                          sum(reply[2] for reply in replies))
+                if all(reply[0] for reply in replies) and totals == wave_totals and totals[0] == totals[1]:
+                    break
+                wave_totals = None
+
+            if wave_totals is None and all(status is not None and status[0] for status in statuses):
+                totals = (sum(status[1] for status in statuses) + coordinator_sent,
+                          sum(status[2] for status in statuses))
+                if totals[0] == totals[1]:
+                    # first round looks terminated; confirm with a second one
+                    wave += 1
+                    wave_totals = totals
+                    for inbox in inboxes:
+                        inbox.put(('probe', wave))
+
+        if stats is not None:
+            expanded, generated, dead_square_prunes, deadlock_prunes = (
+                sum(column) for column in zip(*(status[3] for status in statuses)))
+            stats.expanded += expanded
+            stats.generated += generated
+            stats.dead_square_prunes += dead_square_prunes
+            stats.deadlock_prunes += deadlock_prunes
+
+        if goal_key is None:
+            return ([], -1)
+
+        # walk back from the goal, asking each state's owner for its parent
+        steps = []
+        key = goal_key
+        while key is not None:
+            inboxes[owner(key, workers)].put(('trace', key))
+            message = _receive(outbox, processes)
+            while message[0] != 'node':
+                message = _receive(outbox, processes)
+            key = message[2]
+            steps.append((message[3], message[4]))
+        steps.reverse()
+    finally:
+        for inbox in inboxes:
+            inbox.put(('stop',))
+        for process in processes:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+
+    path = []
+    state = None
+    for robots, boxes in steps:
+        board = Board.from_level(level, robots, boxes)
+        # macro moves are traced as one step; replay the boards they pass through
+        boards = [board] if state is None else intermediate_boards(state.board, board) + [board]
+        for board in boards:
+            depth = len(path)
+            state = State(board, hfn, 0, depth, state)
+            state.f = depth + state.h
+            path.append(state)
+    return (path, len(path)-1)
+
+
+def benchmark(board, hfn, worker_counts, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Solve the board with every number of workers in worker_counts and print the
+    expansions per second of each run and its speedup over the first.
+
+    :param board: The initial board.
+    :type board: Board
+    :param hfn: The heuristic function.
+    :type hfn: Heuristic
+    :param worker_counts: The numbers of workers to try, e.g. [1, 2, 4, 8].
+    :type worker_counts: List[int]
+    """
+    print('{:>8} {:>10} {:>12} {:>10} {:>14} {:>8}'.format(
+        'workers', 'cost', 'expanded', 'time (s)', 'expanded/s', 'speedup'))
+    base_rate = None
+    for workers in worker_counts:
+        stats = SearchStats()
+        time_start = time.time()
+        path, cost = parallel_a_star(board, hfn, workers, batch_size, stats)
+        time_elapsed = time.time() - time_start
+        rate = stats.expanded / time_elapsed if time_elapsed > 0 else 0
+        if base_rate is None:
+            base_rate = rate
+        print('{:>8} {:>10} {:>12} {:>10.2f} {:>14.0f} {:>8.2f}'.format(
+            workers, cost, stats.expanded, time_elapsed, rate, rate / base_rate if base_rate else 0))
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Benchmark hash-distributed parallel A*.")
+    parser.add_argument(
+        "--inputfile",
+        type=str,
+        required=True,
+        help="The file that contains the puzzle."
+    )
+    parser.add_argument(
+        "--heuristic",
+        type=str,
+        required=False,
+        default='matching',
+        choices=list(HEURISTICS),
+        help="The heuristic used by the search."
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs='+',
+        default=[1, 2, 4, multiprocessing.cpu_count()],
+        help="The numbers of worker processes to compare."
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help="The number of successors sent to another worker at once."
+    )
+    args = parser.parse_args()
+
+    benchmark(read_from_file(args.inputfile), HEURISTICS[args.heuristic],
+              sorted(set(args.workers)), args.batch_size)
@@ -0,0 +1,261 @@
+############################################################
+## CSC 384, Intro to AI, University of Toronto.
+## Assignment 1
+##
+## Additive pattern databases: for every placement of up to k boxes
+## on a level, the least number of pushes that gets them onto storage
+## with no other boxes around. Built offline into a binary file that
+## the solver memory-maps.
+############################################################
+
+import argparse
+import hashlib
+import mmap
+import struct
+from array import array
+from itertools import combinations
+
+from board import *
+from matching import UNREACHABLE
+
+MAGIC = b'SOKOPDB1'
+# magic, width, height, pattern size, live cell count, layout digest
+HEADER = struct.Struct('<8sHHBxI20s')
+# table entries are pushes, with this value for placements that can't reach storage
+NO_SOLUTION = 255
+# placements further from storage than this are stored as this, which stays a lower bound
+MAX_PUSHES = NO_SOLUTION - 1
+# the largest total size of the tables that will be built, in bytes
+MAX_TABLE_BYTES = 1 << 30
+
+
+def table_bytes(live_cells, pattern_size):
+    """
+    Returns the total size in bytes of the tables for the given number of live cells.
+
+    :rtype: int
+    """
+    return sum(live_cells ** size for size in range(1, pattern_size + 1))
+
+
+def layout_digest(level):
+    """
+    Returns a digest of the static layout of the level: its size, walls and storage.
+
+    :param level: The level.
+    :type level: Level
+    :rtype: bytes
+    """
+    text = '{}x{}|{}|{}'.format(level.width, level.height, sorted(level.obstacle_set), sorted(level.storage_set))
+    return hashlib.sha1(text.encode()).digest()
+
+
+def _rank(cells, n):
+    """
+    Returns the table index of a sorted tuple of live cell numbers.
+    """
+    rank = 0
+    for cell in cells:
+        rank = rank * n + cell
+    return rank
+
+
+def build_tables(level, pattern_size):
+    """
+    Builds the tables of every pattern size from 1 to pattern_size.
+
+    A table maps every sorted placement of boxes on live cells (cells that aren't dead)
+    to the least number of pushes that moves those boxes onto distinct storage points,
+    found by pulling them breadth first out of every placement on storage. Robot
+    reachability is ignored, so the values are lower bounds.
+
+    :param level: The level.
+    :type level: Level
+    :param pattern_size: The largest number of boxes in a pattern.
+    :type pattern_size: int
+    :return: the live cells, as cell indices, and the tables, one bytearray per pattern size.
+    :rtype: tuple
+    """
+    width = level.width
+    live = [index for index in range(level.cells) if not level.dead[index]]
+    number = {cell: i for i, cell in enumerate(live)}
+    n = len(live)
+    goals = sorted(number[level.index(loc)] for loc in level.storage_set if not level.dead[level.index(loc)])
+    if table_bytes(n, pattern_size) > MAX_TABLE_BYTES:
+        raise ValueError("the tables for patterns of {} boxes on {} live cells would take {} MB".format(
+            pattern_size, n, table_bytes(n, pattern_size) >> 20))
+
+    tables = []
+    for size in range(1, pattern_size + 1):
+        table = bytearray([NO_SOLUTION]) * (n ** size)
+        frontier = []
+        for placement in combinations(goals, size):
+            table[_rank(placement, n)] = 0
+            frontier.append(placement)
+
+        # search until every placement that can reach storage is found, so that only the
+        # ones that can't are left at NO_SOLUTION
+        distance = 0
+        while frontier:
+            distance += 1
+            next_frontier = []
+            for placement in frontier:
+                occupied = {live[cell] for cell in placement}
+                for moved, cell in enumerate(placement):
+                    x, y = level.locations[live[cell]]
+                    for dir, dx, dy in DIRECTIONS:
+                        # the robot stands at x + dx and steps to x + 2dx, pulling the box along
+                        robot_x = x + dx
+                        robot_y = y + dy
+                        step_x = robot_x + dx
+                        step_y = robot_y + dy
+                        if level.is_wall(robot_x, robot_y) or level.is_wall(step_x, step_y):
+                            continue
+                        if robot_y * width + robot_x in occupied or step_y * width + step_x in occupied:
+                            continue
+                        pulled = number.get(robot_y * width + robot_x)
+                        if pulled is None:
+                            continue
+                        new_placement = tuple(sorted(placement[:moved] + (pulled,) + placement[moved+1:]))
+                        rank = _rank(new_placement, n)
+                        if table[rank] == NO_SOLUTION:
+                            table[rank] = min(distance, MAX_PUSHES)
+                            next_frontier.append(new_placement)
+            frontier = next_frontier
+        tables.append(table)
+
+    return live, tables
+
+
+def write_pattern_database(level, pattern_size, filename):
+    """
+    Builds the pattern database of the level and writes it to filename.
+
+    :param level: The level.
+    :type level: Level
+    :param pattern_size: The largest number of boxes in a pattern.
+    :type pattern_size: int
+    :param filename: The file to write.
+    :type filename: str
+    """
+    live, tables = build_tables(level, pattern_size)
+    with open(filename, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, level.width, level.height, pattern_size, len(live), layout_digest(level)))
+        f.write(array('I', live).tobytes())
+        for table in tables:
+            f.write(table)
+
+
+class PatternDatabase:
+    """
+    A heuristic backed by a memory-mapped pattern database file.
+
+    The boxes, in cell order, are split into consecutive groups of the pattern size; since
+    every push moves a single box, the pushes needed by disjoint groups add up to a lower
+    bound. An evaluation costs one table read per group.
+    """
+
+    # the value only depends on the boxes
+    boxes_only = True
+
+    def __init__(self, filename):
+        """
+        Maps the pattern database in filename.
+
+        :param filename: A file written by write_pattern_database.
+        :type filename: str
+        """
+        self.filename = filename
+        with open(filename, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.width, self.height, self.pattern_size, n, self.digest = HEADER.unpack_from(self.data)
+        if magic != MAGIC:
+            raise ValueError("{} is not a pattern database".format(filename))
+        self.n = n
+
+        view = memoryview(self.data)
+        offset = HEADER.size
+        live = view[offset:offset + 4 * n].cast('I')
+        offset += 4 * n
+        # cell index -> live cell number, -1 for dead cells
+        self.numbers = array('i', [-1]) * (self.width * self.height)
+        for i, cell in enumerate(live):
+            self.numbers[cell] = i
+        live.release()
+        self.tables = []
+        for size in range(1, self.pattern_size + 1):
+            self.tables.append(view[offset:offset + n ** size])
+            offset += n ** size
+        self.checked_level = None
+
+    def check(self, level):
+        """
+        Raises ValueError if the database wasn't built for the layout of the level.
+        """
+        if level is self.checked_level:
+            return
+        if (level.width, level.height) != (self.width, self.height) or layout_digest(level) != self.digest:
+            raise ValueError("{} was built for another level".format(self.filename))
+        self.checked_level = level
+
+    def __call__(self, board):
+        """
+        Returns the heuristic value for the given board.
+
+        :param board: The current board.
+        :type board: Board
+        :return: The heuristic value.
+        :rtype: int
+        """
+        self.check(board.level)
+        width = board.level.width
+        numbers = self.numbers
+        cells = sorted(numbers[box[1] * width + box[0]] for box in board.boxes)
+        if cells and cells[0] < 0:
+            return UNREACHABLE
+
+        n = self.n
+        size = self.pattern_size
+        total = 0
+        for start in range(0, len(cells), size):
+            group = cells[start:start + size]
+            rank = 0
+            for cell in group:
+                rank = rank * n + cell
+            value = self.tables[len(group) - 1][rank]
+            if value == NO_SOLUTION:
+                return UNREACHABLE
+            total += value
+        return total
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Build the pattern database of a puzzle's layout.")
+    parser.add_argument(
+        "--inputfile",
+        type=str,
+        required=True,
+        help="The file that contains the puzzle."
+    )
+    parser.add_argument(
+        "--outputfile",
+        type=str,
+        required=True,
+        help="The pattern database file to write."
+    )
+    parser.add_argument(
+        "--pattern-size",
+        type=int,
+        required=False,
+        default=2,
+        help="The largest number of boxes in a pattern."
+    )
+    args = parser.parse_args()
+
+    if args.pattern_size < 1:
+        parser.error("--pattern-size must be at least 1")
+    try:
+        write_pattern_database(read_from_file(args.inputfile).level, args.pattern_size, args.outputfile)
+    except ValueError as e:
+        parser.error(str(e))
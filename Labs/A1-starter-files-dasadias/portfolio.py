@@ -0,0 +1,178 @@
+############################################################
+## CSC 384, Intro to AI, University of Toronto.
+## Assignment 1
+##
+## Portfolio solver: races several search configurations in
+## separate processes and keeps the first (or best) solution.
+############################################################
+
+import hashlib
+import json
+import multiprocessing
+import os
+import queue
+import time
+
+from board import *
+from solve import search, HEURISTICS
+from stats import SearchStats
+
+# The configurations raced by default, as (algorithm, heuristic).
+DEFAULT_PORTFOLIO = [
+    ('a_star', 'matching'),
+    ('push_a_star', 'matching'),
+    ('a_star', 'basic'),
+    ('a_star', 'advanced'),
+    ('dfs', 'zero'),
+    ('bidirectional', 'zero'),
+]
+
+# How often, in seconds, the racers are checked for having died without a result.
+POLL_INTERVAL = 1.0
+
+
+def level_fingerprint(board):
+    """
+    Returns a hex digest identifying the puzzle of the board: its walls, storage and initial positions.
+
+    :param board: The initial board.
+    :type board: Board
+    :rtype: str
+    """
+    return hashlib.sha1(str(board).encode()).hexdigest()
+
+
+def _load_cache(cache_file):
+    if cache_file is None or not os.path.exists(cache_file):
+        return {}
+    with open(cache_file) as f:
+        return json.load(f)
+
+
+def _save_cache(cache_file, cache):
+    # write to a temporary file first so a concurrent reader never sees half a file
+    temp_file = cache_file + '.tmp'
+    with open(temp_file, 'w') as f:
+        json.dump(cache, f, indent=1, sort_keys=True)
+    os.replace(temp_file, cache_file)
+
+
+def _race(config, board, results):
+    """
+    Runs one configuration of the portfolio and puts its outcome on the results queue:
+    (config, the (robots, boxes) of every step or None, cost, stats or the error message).
+    """
+    algorithm, heuristic = config
+    stats = SearchStats()
+    try:
+        path, cost = search(board, algorithm, HEURISTICS[heuristic], stats)
+    except Exception as e:
+        results.put((config, None, -1, str(e)))
+        return
+    if not path:
+        results.put((config, None, -1, stats))
+        return
+    results.put((config, [(state.board.robots, state.board.boxes) for state in path], cost, stats))
+
+
+def _rebuild_path(board, steps, hfn):
+    """
+    Returns the path of States for the (robots, boxes) of every step of a solution.
+    """
+    path = []
+    state = None
+    for depth, (robots, boxes) in enumerate(steps):
+        state = State(Board.from_level(board.level, robots, boxes), hfn, 0, depth, state)
+        state.f = depth + state.h
+        path.append(state)
+    return path
+
+
+def solve_portfolio(board, configs=DEFAULT_PORTFOLIO, workers=None, time_limit=None, cache_file=None,
+                    stats=None):
+    """
+    Race several search configurations on the board, each in its own process.
+
+    Without a time limit, the first configuration to find a solution wins and the others
+    are cancelled. With one, the configurations run until they are all done or the time
+    is up, and the cheapest solution wins. The winner is remembered in cache_file under
+    the level's fingerprint, and is started first the next time the level is solved.
+
+    :param board: The initial board.
+    :type board: Board
+    :param configs: The (algorithm, heuristic) configurations to race.
+    :type configs: List[tuple]
+    :param workers: The number of configurations run at once; one per core by default.
+    :type workers: Optional[int]
+    :param time_limit: The wall-clock budget in seconds, or None to stop at the first solution.
+    :type time_limit: Optional[float]
+    :param cache_file: The JSON file remembering the winners, or None to not remember them.
+    :type cache_file: Optional[str]
+    :param stats: Receives the statistics of the winning configuration and its name.
+    :type stats: Optional[SearchStats]
+    :return: (the path to goal state, solution cost)
+    :rtype: List[State], int
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    deadline = None if time_limit is None else time.time() + time_limit
+    fingerprint = level_fingerprint(board)
+    cache = _load_cache(cache_file)
+
+    pending = [tuple(config) for config in configs]
+    if fingerprint in cache:
+        cached = tuple(cache[fingerprint])
+        if cached in pending:
+            pending.remove(cached)
+        pending.insert(0, cached)
+
+    results = multiprocessing.Queue()
+    running = {}
+    best = None
+
+    try:
+        while pending or running:
+            while pending and len(running) < workers:
+                config = pending.pop(0)
+                process = multiprocessing.Process(target=_race, args=(config, board, results), daemon=True)
+                process.start()
+                running[config] = process
+
+            timeout = POLL_INTERVAL if deadline is None else min(POLL_INTERVAL, deadline - time.time())
+            if timeout <= 0:
+                break
+            try:
+                config, steps, cost, outcome = results.get(timeout=timeout)
+            except queue.Empty:
+                # a racer that was killed (e.g. out of memory) never posts its result
+                for config, process in list(running.items()):
+                    if process.exitcode not in (None, 0):
+                        running.pop(config).join()
+                continue
+            running.pop(config).join()
+
+            if steps is not None and (best is None or len(steps) < len(best[1])):
+                best = (config, steps, cost, outcome)
+                if deadline is None:
+                    break
+    finally:
+        # cancel whatever is still searching
+        for process in running.values():
+            process.terminate()
+        for process in running.values():
+            process.join()
+
+    if best is None:
+        return ([], -1)
+
+    config, steps, cost, outcome = best
+    if stats is not None:
+        # the caller's clock keeps running; only the counters come from the winner
+        stats.__dict__.update((name, value) for name, value in vars(outcome).items() if not name.startswith('_'))
+        stats.winner = '{}/{}'.format(*config)
+    if cache_file is not None:
+        cache = _load_cache(cache_file)
+        cache[fingerprint] = list(config)
+        _save_cache(cache_file, cache)
+
+    return (_rebuild_path(board, steps, HEURISTICS[config[1]]), cost)
@@ -0,0 +1,277 @@
+############################################################
+## CSC 384, Intro to AI, University of Toronto.
+## Assignment 1
+##
+## Push-level search: every move of the search pushes a box, and
+## the robot is only known up to the region it can walk to.
+## The robot's steps are rebuilt when the solution is written.
+############################################################
+
+from heapq import heappush, heappop
+
+from board import *
+from deadlock import is_deadlock
+from solve import is_goal
+
+
+class PushState(State):
+    """
+    A State whose board has its robot normalized to the top-left cell of the region
+    the robot can reach, and which remembers the push that led to it.
+    """
+
+    __slots__ = ('push',)
+
+    def __init__(self, board: Board, hfn, f: int, depth: int, parent=None, h=None, push=None):
+        """
+        :param push: The push from the parent: (cell index of the pushed box, index into DIRECTIONS).
+        :type push: Optional[tuple]
+        """
+        State.__init__(self, board, hfn, f, depth, parent, h)
+        self.push = push
+
+
+def reachable(level, robot, box_set):
+    """
+    Returns a bitmap, indexed by cell, of the cells the robot can walk to without pushing a box.
+
+    :param level: The level of the board.
+    :type level: Level
+    :param robot: The position of the robot.
+    :type robot: tuple
+    :param box_set: The positions of the boxes.
+    :type box_set: Set[tuple]
+    :rtype: bytearray
+    """
+    width = level.width
+    locations = level.locations
+    seen = bytearray(level.cells)
+    seen[robot[1] * width + robot[0]] = 1
+    stack = [robot]
+    while stack:
+        x, y = stack.pop()
+        for dir, dx, dy in DIRECTIONS:
+            next_x = x + dx
+            next_y = y + dy
+            if level.is_wall(next_x, next_y):
+                continue
+            index = next_y * width + next_x
+            if seen[index] or locations[index] in box_set:
+                continue
+            seen[index] = 1
+            stack.append(locations[index])
+    return seen
+
+
+def normalize(board):
+    """
+    Returns the board with its robot moved to the top-left cell of the region it can reach.
+
+    :param board: A board with a single robot.
+    :type board: Board
+    :rtype: Board
+    """
+    level = board.level
+    seen = reachable(level, board.robots[0], set(board.boxes))
+    return Board.from_level(level, (level.locations[seen.find(1)],), board.boxes, board.on_storage)
+
+
+def get_push_successors(state, stats=None):
+    """
+    Return the states reached from the given push-level state by a single box push.
+
+    :param state: The current state.
+    :type state: PushState
+    :param stats: Statistics to count the expansion and the pruned pushes in.
+    :type stats: Optional[SearchStats]
+    :rtype: List[PushState]
+    """
+    successors = []
+    board = state.board
+    level = board.level
+    width = level.width
+    locations = level.locations
+    dead = level.dead
+    storage_set = level.storage_set
+    box_set = set(board.boxes)
+    seen = reachable(level, board.robots[0], box_set)
+    hfn = state.hfn
+    box_cost = getattr(hfn, 'box_cost', None)
+
+    for box_index, box in enumerate(board.boxes):
+        for dir_index, (dir, dx, dy) in enumerate(DIRECTIONS):
+            # the robot has to be able to get behind the box
+            robot_x = box[0] - dx
+            robot_y = box[1] - dy
+            if level.is_wall(robot_x, robot_y) or not seen[robot_y * width + robot_x]:
+                continue
+            target_x = box[0] + dx
+            target_y = box[1] + dy
+            if level.is_wall(target_x, target_y):
+                continue
+            target = locations[target_y * width + target_x]
+            if target in box_set:
+                continue
+            if dead[target_y * width + target_x]:
+                if stats is not None:
+                    stats.dead_square_prunes += 1
+                continue
+            boxes = board.boxes[:box_index] + (target,) + board.boxes[box_index+1:]
+            new_box_set = set(boxes)
+            if is_deadlock(level, new_box_set, target):
+                if stats is not None:
+                    stats.deadlock_prunes += 1
+                continue
+
+            # after the push the robot stands where the box was
+            new_seen = reachable(level, box, new_box_set)
+            on_storage = board.on_storage + (target in storage_set) - (box in storage_set)
+            new_board = Board.from_level(level, (locations[new_seen.find(1)],), boxes, on_storage)
+
+            if box_cost is not None:
+                h = state.h - box_cost(board, box) + box_cost(new_board, target)
+            else:
+                h = hfn(new_board)
+            depth = state.depth + 1
+            successors.append(PushState(new_board, hfn, depth + h, depth, state, h,
+                                        (box[1] * width + box[0], dir_index)))
+
+    if stats is not None:
+        stats.expanded += 1
+        stats.generated += len(successors)
+    return successors
+
+
+def walk(level, start, goal, box_set):
+    """
+    Returns the indices into DIRECTIONS of a shortest walk of the robot from start to goal
+    that doesn't push any box, or None if there is no such walk.
+
+    :rtype: Optional[List[int]]
+    """
+    width = level.width
+    locations = level.locations
+    came_from = {start: None}
+    frontier = [start]
+    while frontier and goal not in came_from:
+        next_frontier = []
+        for x, y in frontier:
+            for dir_index, (dir, dx, dy) in enumerate(DIRECTIONS):
+                next_x = x + dx
+                next_y = y + dy
+                if level.is_wall(next_x, next_y):
+                    continue
+                loc = locations[next_y * width + next_x]
+                if loc in came_from or loc in box_set:
+                    continue
+                came_from[loc] = ((x, y), dir_index)
+                next_frontier.append(loc)
+        frontier = next_frontier
+
+    if goal not in came_from:
+        return None
+    moves = []
+    loc = goal
+    while came_from[loc] is not None:
+        loc, dir_index = came_from[loc]
+        moves.append(dir_index)
+    moves.reverse()
+    return moves
+
+
+def expand_pushes(init_board, pushes, hfn):
+    """
+    Rebuild the step-by-step path of a push-level solution.
+
+    :param init_board: The initial board, with the robot where it really starts.
+    :type init_board: Board
+    :param pushes: The pushes of the solution in order, as (box cell index, index into DIRECTIONS).
+    :type pushes: List[tuple]
+    :param hfn: The heuristic function given to the states of the path.
+    :return: The path, one State per robot step.
+    :rtype: List[State]
+    """
+    level = init_board.level
+    width = level.width
+    state = State(init_board, hfn, 0, 0, None)
+    path = [state]
+    for box_index, dir_index in pushes:
+        box = level.locations[box_index]
+        dir, dx, dy = DIRECTIONS[dir_index]
+        board = state.board
+        moves = walk(level, board.robots[0], (box[0] - dx, box[1] - dy), set(board.boxes))
+        if moves is None:
+            raise ValueError("the robot can't reach {} to push it {}".format(box, dir))
+        moves.append(dir_index)
+
+        for move in moves:
+            dir, dx, dy = DIRECTIONS[move]
+            robot = board.robots[0]
+            new_loc = level.locations[(robot[1] + dy) * width + robot[0] + dx]
+            boxes = board.boxes
+            if new_loc in boxes:
+                box_loc = level.locations[(new_loc[1] + dy) * width + new_loc[0] + dx]
+                box_pos = boxes.index(new_loc)
+                boxes = boxes[:box_pos] + (box_loc,) + boxes[box_pos+1:]
+            board = Board.from_level(level, (new_loc,), boxes)
+            state = State(board, hfn, 0, state.depth + 1, state)
+            state.f = state.depth + state.h
+            path.append(state)
+    return path
+
+
+def get_pushes(state):
+    """
+    Return the pushes on the path from the initial push-level state to the given state, in order.
+
+    :param state: The current state.
+    :type state: PushState
+    :rtype: List[tuple]
+    """
+    pushes = []
+    while state.parent is not None:
+        pushes.append(state.push)
+        state = state.parent
+    pushes.reverse()
+    return pushes
+
+
+def push_a_star(init_board, hfn, stats=None):
+    """
+    Run A* over box pushes given an initial board with a single robot and a heuristic function.
+
+    The solution found uses as few pushes as possible; the robot's walks between pushes
+    are shortest walks. The returned path has one state per robot step, like a_star's.
+
+    :param init_board: The initial starting board.
+    :type init_board: Board
+    :param hfn: The heuristic function. It is estimating pushes, so it must only look at boxes.
+    :type hfn: Heuristic
+    :param stats: Statistics to fill in during the search.
+    :type stats: Optional[SearchStats]
+    :return: (the path to goal state, solution cost)
+    :rtype: List[State], int
+    """
+    if len(init_board.robots) != 1:
+        raise ValueError("push-level search needs a board with a single robot")
+
+    init_state = PushState(normalize(init_board), hfn, 0, 0, None)
+    init_state.f = init_state.h
+    visited = set()
+    min_heap = []
+    heappush(min_heap, (init_state.f, init_state))
+
+    while len(min_heap) > 0:
+        curr_state = heappop(min_heap)[1]
+
+        if curr_state.key not in visited:
+            if is_goal(curr_state):
+                path = expand_pushes(init_board, get_pushes(curr_state), hfn)
+                return (path, len(path)-1)
+
+            successors = get_push_successors(curr_state, stats)
+            for successor in successors:
+                heappush(min_heap, (successor.f, successor))
+            visited.add(curr_state.key)
+
+    return ([], -1)
@@ -0,0 +1,151 @@
+############################################################
+## CSC 384, Intro to AI, University of Toronto.
+## Assignment 1
+##
+## The search graph of a search as flat arrays of parent indices
+## and move codes, so explored states don't have to be kept around
+## for their boards; the path is rebuilt by replaying the moves.
+############################################################
+
+from array import array
+
+from board import *
+
+# The move code of the root node.
+NO_MOVE = 255
+
+
+def move_code(robot_index, dir_index):
+    """
+    Returns the code of a move of the robot in the direction DIRECTIONS[dir_index].
+
+    :rtype: int
+    """
+    return robot_index * len(DIRECTIONS) + dir_index
+
+
+def play_move(board, code):
+    """
+    Returns the board after the move with the given code, pushing a box if there is one.
+    The move is assumed to be legal.
+
+    :param board: The board.
+    :type board: Board
+    :param code: The move code.
+    :type code: int
+    :rtype: Board
+    """
+    level = board.level
+    robot_index, dir_index = divmod(code, len(DIRECTIONS))
+    dir, dx, dy = DIRECTIONS[dir_index]
+    robot = board.robots[robot_index]
+    new_loc = level.locations[(robot[1] + dy) * level.width + robot[0] + dx]
+    boxes = board.boxes
+    on_storage = board.on_storage
+    if new_loc in boxes:
+        box_loc = level.locations[(new_loc[1] + dy) * level.width + new_loc[0] + dx]
+        box_index = boxes.index(new_loc)
+        boxes = boxes[:box_index] + (box_loc,) + boxes[box_index+1:]
+        on_storage += (box_loc in level.storage_set) - (new_loc in level.storage_set)
+    robots = board.robots[:robot_index] + (new_loc,) + board.robots[robot_index+1:]
+    return Board.from_level(level, robots, boxes, on_storage)
+
+
+def intermediate_boards(board, next_board):
+    """
+    Returns the boards that a macro move from board to next_board passes through, in order:
+    the robot that moved goes step by step in a straight line, pushing a box if there is one.
+    The list is empty if next_board is a single step away.
+
+    :param board: The board before the move.
+    :type board: Board
+    :param next_board: The board after the move.
+    :type next_board: Board
+    :rtype: List[Board]
+    """
+    boards = []
+    for robot_index, (robot, new_robot) in enumerate(zip(board.robots, next_board.robots)):
+        if robot == new_robot:
+            continue
+        dx = new_robot[0] - robot[0]
+        dy = new_robot[1] - robot[1]
+        steps = abs(dx) + abs(dy)
+        for dir_index, (dir, step_x, step_y) in enumerate(DIRECTIONS):
+            if (step_x * steps, step_y * steps) == (dx, dy):
+                for step in range(steps - 1):
+                    board = play_move(board, move_code(robot_index, dir_index))
+                    boards.append(board)
+        break
+    return boards
+
+
+class SearchGraph:
+    """
+    The nodes a search has reached: for each node, the index of its parent
+    and the code of the move from the parent, in 5 bytes per node.
+    """
+
+    def __init__(self):
+        self.parents = array('i')
+        self.moves = array('B')
+
+    def add(self, parent, move, steps=1):
+        """
+        Adds a node and returns its index. A macro move of several steps in the same
+        direction is added as a chain of nodes, one per step.
+
+        :param parent: The index of the parent node, or -1 for the root.
+        :type parent: int
+        :param move: The code of the move from the parent, or NO_MOVE for the root.
+        :type move: int
+        :param steps: The number of times the move is made.
+        :type steps: int
+        :rtype: int
+        """
+        for step in range(steps):
+            self.parents.append(parent)
+            self.moves.append(move)
+            parent = len(self.parents) - 1
+        return parent
+
+    def __len__(self):
+        return len(self.parents)
+
+    def moves_to(self, node):
+        """
+        Returns the codes of the moves from the root to the node, in order.
+
+        :param node: The index of the node.
+        :type node: int
+        :rtype: List[int]
+        """
+        codes = []
+        while self.parents[node] >= 0:
+            codes.append(self.moves[node])
+            node = self.parents[node]
+        codes.reverse()
+        return codes
+
+    def path(self, init_board, node, hfn):
+        """
+        Rebuilds the path of states from the root to the node by replaying
+        the moves on the initial board.
+
+        :param init_board: The board of the root.
+        :type init_board: Board
+        :param node: The index of the node.
+        :type node: int
+        :param hfn: The heuristic function of the states.
+        :type hfn: Heuristic
+        :rtype: List[State]
+        """
+        state = State(init_board, hfn, 0, 0, None)
+        state.f = state.h
+        path = [state]
+        board = init_board
+        for code in self.moves_to(node):
+            board = play_move(board, code)
+            state = State(board, hfn, 0, state.depth + 1, state, move=code)
+            state.f = state.depth + state.h
+            path.append(state)
+        return path
@@ -0,0 +1,187 @@
+############################################################
+## CSC 384, Intro to AI, University of Toronto.
+## Assignment 1
+##
+## Persistent solution cache: solved levels are stored on disk
+## under a fingerprint that is the same for all rotations and
+## mirror images of a level, and evicted least recently used first.
+############################################################
+
+import hashlib
+import sqlite3
+import time
+
+from board import *
+from moves import MOVE_CHARS, parse_moves, path_to_moves, replay
+
+# Number of solutions kept by default.
+DEFAULT_CACHE_SIZE = 10000
+
+# The eight symmetries of a grid, as functions of (x, y, width, height) giving the new
+# position, with whether they swap width and height.
+SYMMETRIES = [
+    (lambda x, y, w, h: (x, y), False),
+    (lambda x, y, w, h: (w - 1 - x, y), False),
+    (lambda x, y, w, h: (x, h - 1 - y), False),
+    (lambda x, y, w, h: (w - 1 - x, h - 1 - y), False),
+    (lambda x, y, w, h: (y, x), True),
+    (lambda x, y, w, h: (h - 1 - y, x), True),
+    (lambda x, y, w, h: (y, w - 1 - x), True),
+    (lambda x, y, w, h: (h - 1 - y, w - 1 - x), True),
+]
+
+
+def _direction_map(symmetry):
+    """
+    Returns, for every index into DIRECTIONS, the index of the direction it becomes under the symmetry.
+    """
+    transform, swaps = symmetry
+    mapping = []
+    for dir, dx, dy in DIRECTIONS:
+        # a step from the middle of a 3x3 grid shows where the direction goes
+        x, y = transform(1 + dx, 1 + dy, 3, 3)
+        for new_index, (new_dir, new_dx, new_dy) in enumerate(DIRECTIONS):
+            if (new_dx, new_dy) == (x - 1, y - 1):
+                mapping.append(new_index)
+    return mapping
+
+
+def canonical_form(board):
+    """
+    Returns the fingerprint of the level of the board, walls, storage and initial positions
+    included, and the index of the symmetry that turns the board into its canonical orientation.
+    The fingerprint is the same for every rotation and mirror image of the level.
+
+    :param board: The initial board.
+    :type board: Board
+    :rtype: tuple
+    """
+    width = board.width
+    height = board.height
+    best = None
+    for index, (transform, swaps) in enumerate(SYMMETRIES):
+        def moved(locations):
+            return [transform(x, y, width, height) for x, y in locations]
+        size = (height, width) if swaps else (width, height)
+        text = '{}|{}|{}|{}|{}'.format(size, sorted(moved(board.obstacles)), sorted(moved(board.storage)),
+                                       moved(board.robots), sorted(moved(board.boxes)))
+        if best is None or text < best[0]:
+            best = (text, index)
+    return hashlib.sha256(best[0].encode()).hexdigest(), best[1]
+
+
+def _map_moves(moves, robots, mapping):
+    """
+    Returns the move string with every direction replaced through mapping.
+    """
+    chars = []
+    for robot, dir_index, pushes in parse_moves(moves, robots):
+        char = MOVE_CHARS[mapping[dir_index]]
+        if pushes:
+            char = char.upper()
+        if robots > 1:
+            char = chr(ord(CHAR_ROBOT) + robot) + char
+        chars.append(char)
+    return ''.join(chars)
+
+
+class SolutionCache:
+    """
+    A solution cache in an SQLite file, holding at most max_entries solutions.
+    SQLite takes care of locking, so several solvers can share one file.
+    """
+
+    def __init__(self, filename, max_entries=DEFAULT_CACHE_SIZE):
+        """
+        :param filename: The cache file; it is created if it doesn't exist.
+        :type filename: str
+        :param max_entries: The number of solutions kept.
+        :type max_entries: int
+        """
+        if max_entries < 1:
+            raise ValueError("a solution cache needs room for at least one solution")
+        self.max_entries = max_entries
+        self.connection = sqlite3.connect(filename, timeout=30)
+        with self.connection:
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS solutions ('
+                'fingerprint TEXT PRIMARY KEY, moves TEXT NOT NULL, cost INTEGER NOT NULL, '
+                'algorithm TEXT, last_used REAL NOT NULL, optimal INTEGER NOT NULL DEFAULT 0)')
+            columns = [row[1] for row in self.connection.execute('PRAGMA table_info(solutions)')]
+            if 'optimal' not in columns:
+                # caches written before solutions were marked optimal
+                self.connection.execute('ALTER TABLE solutions ADD COLUMN optimal INTEGER NOT NULL DEFAULT 0')
+            self.connection.execute('CREATE INDEX IF NOT EXISTS solutions_last_used ON solutions (last_used)')
+
+    def lookup(self, board, hfn=heuristic_zero, optimal_only=False):
+        """
+        Returns the cached (path, cost) of the board's level, rebuilt for the board's
+        orientation, or None if it isn't cached.
+
+        :param board: The initial board.
+        :type board: Board
+        :param hfn: The heuristic function given to the states of the path.
+        :param optimal_only: Only return a solution that is known to be optimal.
+        :type optimal_only: bool
+        :rtype: Optional[tuple]
+        """
+        fingerprint, symmetry = canonical_form(board)
+        query = 'SELECT moves, cost FROM solutions WHERE fingerprint = ?'
+        if optimal_only:
+            query += ' AND optimal'
+        row = self.connection.execute(query, (fingerprint,)).fetchone()
+        if row is None:
+            return None
+        with self.connection:
+            self.connection.execute('UPDATE solutions SET last_used = ? WHERE fingerprint = ?',
+                                    (time.time(), fingerprint))
+
+        # the moves are stored in the canonical orientation; turn them back
+        mapping = _direction_map(SYMMETRIES[symmetry])
+        inverse = [mapping.index(dir_index) for dir_index in range(len(DIRECTIONS))]
+        moves = _map_moves(row[0], len(board.robots), inverse)
+
+        path = []
+        state = None
+        for depth, new_board in enumerate(replay(board, moves)):
+            state = State(new_board, hfn, 0, depth, state)
+            state.f = depth + state.h
+            path.append(state)
+        return (path, row[1])
+
+    def store(self, board, path, cost, algorithm=None, optimal=False):
+        """
+        Stores the solution of the board's level, unless a cheaper one is already stored,
+        then evicts the least recently used solutions beyond max_entries.
+
+        :param board: The initial board.
+        :type board: Board
+        :param path: The path of the solution.
+        :type path: List[State]
+        :param cost: The cost of the solution.
+        :type cost: int
+        :param algorithm: The algorithm that found the solution.
+        :type algorithm: Optional[str]
+        :param optimal: Whether the solution is known to be optimal.
+        :type optimal: bool
+        """
+        fingerprint, symmetry = canonical_form(board)
+        moves = _map_moves(path_to_moves(path), len(board.robots), _direction_map(SYMMETRIES[symmetry]))
+        with self.connection:
+            self.connection.execute(
+                'INSERT INTO solutions (fingerprint, moves, cost, algorithm, last_used, optimal) '
+                'VALUES (?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (fingerprint) DO UPDATE SET moves = excluded.moves, cost = excluded.cost, '
+                'algorithm = excluded.algorithm, last_used = excluded.last_used, optimal = excluded.optimal '
+                'WHERE excluded.cost < cost OR (excluded.cost = cost AND excluded.optimal > optimal)',
+                (fingerprint, moves, cost, algorithm, time.time(), int(optimal)))
+            self.connection.execute(
+                'DELETE FROM solutions WHERE fingerprint IN '
+                '(SELECT fingerprint FROM solutions ORDER BY last_used DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,))
+
+    def __len__(self):
+        return self.connection.execute('SELECT COUNT(*) FROM solutions').fetchone()[0]
+
+    def close(self):
+        self.connection.close()
@@ -17,6 +17,15 @@ import math # for infinity
 #from optional import Optional
 
 from board import *
+from deadlock import is_deadlock
+from matching import heuristic_matching
+from moves import path_to_moves
+from stats import SearchStats
+from searchgraph import SearchGraph, NO_MOVE, intermediate_boards, move_code
+from transposition import TranspositionTable, DEFAULT_TT_SIZE
+
+# The heuristic weights of the successive iterations of anytime_a_star.
+DEFAULT_WEIGHTS = (5, 3, 2, 1.5, 1)
 
 def is_goal(state):
     """
@@ -28,10 +37,9 @@ def is_goal(state):
     :rtype: bool
     """
     # if we are at goal state, then all storage points in the Board of the state
-    # are filled with the boxes
-    if sorted(state.board.boxes) == sorted(state.board.storage):
-        return True
-    return False
+    # are filled with the boxes; the board keeps count of the boxes on storage
+    board = state.board
+    return board.on_storage == len(board.boxes) == len(board.level.storage)
 
 
 def get_path(state):
@@ -48,104 +56,138 @@ def get_path(state):
     state_to_add = state
     while True:
         path.append(state_to_add)
-        state_to_add = state_to_add.parent
-        if state_to_add is None:
+        parent = state_to_add.parent
+        if parent is None:
             break
+        # a macro move skips the states it pushes the box through; put them back
+        if state_to_add.depth - parent.depth > 1:
+            between = []
+            for board in intermediate_boards(parent.board, state_to_add.board):
+                between.append(State(board, parent.hfn, 0, parent.depth + len(between) + 1, parent))
+            for step in between:
+                step.f = step.depth + step.h
+            for before, after in zip(between, between[1:] + [state_to_add]):
+                after.parent = before
+            path.extend(reversed(between))
+        state_to_add = parent
     if path is not None:
         path.reverse()
     
     return path
 
-def check_valid(loc, state, dir):
-    '''
-    Returns 1 if loc is empty
-    Returns 2 if loc has a box but can be moved
-    Returns -1 if there is an obstacle/box that cannot be moved
-    '''
-    if loc in state.board.obstacles:
-        return -1
-    if loc in state.board.robots:
-        return -1
-    if loc in state.board.boxes:
-        # check location in dir to see if there is wall or another box
-        new_loc = []
-        if dir is 'up':
-            new_loc = [loc[0], loc[1]-1]
-        elif dir is 'down':
-            new_loc = [loc[0], loc[1]+1]
-        elif dir is 'left':
-            new_loc = [loc[0]-1, loc[1]]
-        elif dir is 'right':
-            new_loc = [loc[0]+1, loc[1]]
-        new_loc_tup = (new_loc[0], new_loc[1])
-        if new_loc_tup in state.board.obstacles:
-            return -1
-        elif new_loc_tup in state.board.boxes:
-            return -1
-        elif new_loc_tup in state.board.robots:
-            return -1
-        else:
-            return 2
-    
-    return 1
-
-def get_successors(state):
+def get_successors(state, stats=None):
     """
     Return a list containing the successor states of the given state.
     The states in the list may be in any arbitrary order.
 
     :param state: The current state.
     :type state: State
+    :param stats: Statistics to count the expansion and the pruned moves in.
+    :type stats: Optional[SearchStats]
     :return: The list of successor states.
     :rtype: List[State]
     """
 
     # any robot can move up, down, left, right
+    # walls are looked up in the level's bitmap and robots/boxes in per-state sets,
+    # so every neighbour test is constant time
     
     successors = []
-    fixed_state = state
-    dirs = ['up', 'down', 'left', 'right']
-    for i in range(len(fixed_state.board.robots)):
-        robot = state.board.robots[i]
-        for dir in dirs:
-
-            new_loc_list = []
-            box_loc_list = []
-            if dir is 'up':
-                new_loc_list = [robot[0], robot[1]-1]
-                box_loc_list = [robot[0], robot[1]-2]
-            elif dir is 'down':
-                new_loc_list = [robot[0], robot[1]+1]
-                box_loc_list = [robot[0], robot[1]+2]
-            elif dir is 'left':
-                new_loc_list = [robot[0]-1, robot[1]]
-                box_loc_list = [robot[0]-2, robot[1]]
-            elif dir is 'right':
-                new_loc_list = [robot[0]+1, robot[1]]
-                box_loc_list = [robot[0]+2, robot[1]]
-            new_loc = (new_loc_list[0], new_loc_list[1]) 
-            box_loc = (box_loc_list[0], box_loc_list[1])
-            is_valid = check_valid(new_loc, state, dir)
-            
-            if is_valid is 1 or is_valid is 2:
-                # loc is valid, create new state and just move the robot loc
-                new_board = Board(state.board.name, state.board.width, state.board.height, state.board.robots.copy(), state.board.boxes.copy(), state.board.storage.copy(), state.board.obstacles)
-
-                # update robot location to new coords
-                new_board.robots[i] = new_loc
-
-                if is_valid is 2:
-                    # need to move box according to direction
-                    box_index = state.board.boxes.index(new_loc)
-                    new_board.boxes[box_index] = box_loc
-
-                successor = State(new_board, state.hfn, 0, state.depth + 1, state)
-                successor.f = state.f - state.hfn(state.board) + successor.hfn(successor.board) + 1
-                successors.append(successor)
+    board = state.board
+    level = board.level
+    walls = level.walls
+    stride = level.wall_stride
+    width = level.width
+    locations = level.locations
+    dead = level.dead
+    tunnels = level.tunnels
+    storage_set = level.storage_set
+    # with one robot nothing else can happen while a box is pushed through a tunnel
+    macros = len(board.robots) == 1
+    robot_set = set(board.robots)
+    box_set = set(board.boxes)
+    hfn = state.hfn
+    box_cost = getattr(hfn, 'box_cost', None)
+    boxes_only = box_cost is not None or getattr(hfn, 'boxes_only', False)
+
+    for i, robot in enumerate(board.robots):
+        for dir_index, (dir, dx, dy) in enumerate(DIRECTIONS):
+            x = robot[0] + dx
+            y = robot[1] + dy
+            if walls[(y + 1) * stride + x + 1]:
+                continue
+            new_loc = locations[y * width + x]
+            if new_loc in robot_set:
+                continue
+
+            boxes = board.boxes
+            on_storage = board.on_storage
+            steps = 1
+            if new_loc in box_set:
+                # need to move box according to direction, if the cell behind it is free
+                box_x = x + dx
+                box_y = y + dy
+                if walls[(box_y + 1) * stride + box_x + 1]:
+                    continue
+                box_loc = locations[box_y * width + box_x]
+                if box_loc in box_set or box_loc in robot_set:
+                    continue
+                # never push a box onto a square it can't leave towards storage
+                if dead[box_y * width + box_x]:
+                    if stats is not None:
+                        stats.dead_square_prunes += 1
+                    continue
+                box_from = new_loc
+                # once both the box and the robot behind it are in a one-wide tunnel, the box
+                # can only go on: push it through to the end as one macro move
+                if macros:
+                    tunnel = TUNNEL_VERTICAL if dy else TUNNEL_HORIZONTAL
+                    while tunnels[y * width + x] & tunnel and tunnels[box_y * width + box_x] & tunnel:
+                        next_x = box_x + dx
+                        next_y = box_y + dy
+                        if (walls[(next_y + 1) * stride + next_x + 1] or dead[next_y * width + next_x]
+                                or locations[next_y * width + next_x] in box_set):
+                            break
+                        x, y = box_x, box_y
+                        box_x, box_y = next_x, next_y
+                        steps += 1
+                    if steps > 1:
+                        new_loc = locations[y * width + x]
+                        box_loc = locations[box_y * width + box_x]
+                        if stats is not None:
+                            stats.tunnel_macros += 1
+                box_index = boxes.index(box_from)
+                boxes = boxes[:box_index] + (box_loc,) + boxes[box_index+1:]
+                on_storage += (box_loc in storage_set) - (box_from in storage_set)
+                # nor into a group of boxes frozen off storage
+                if is_deadlock(level, set(boxes), box_loc):
+                    if stats is not None:
+                        stats.deadlock_prunes += 1
+                    continue
+
+            # update robot location to new coords
+            robots = board.robots[:i] + (new_loc,) + board.robots[i+1:]
+            new_board = Board.from_level(level, robots, boxes, on_storage)
+
+            # only recompute what the move could have changed
+            if boxes is board.boxes and boxes_only:
+                h = state.h
+            elif boxes is not board.boxes and box_cost is not None:
+                h = state.h - box_cost(board, box_from) + box_cost(new_board, box_loc)
+            else:
+                h = hfn(new_board)
+
+            # a macro move costs one per step
+            depth = state.depth + steps
+            successors.append(State(new_board, hfn, depth + h, depth, state, h, move_code(i, dir_index)))
+
+    if stats is not None:
+        stats.expanded += 1
+        stats.generated += len(successors)
     return successors
 
 
-def dfs(init_board):
+def dfs(init_board, stats=None):
     """
     Run the DFS algorithm given an initial board.
 
@@ -156,6 +198,8 @@ def dfs(init_board):
 
     :param init_board: The initial board.
     :type init_board: Board
+    :param stats: Statistics to fill in during the search.
+    :type stats: Optional[SearchStats]
     :return: (the path to goal state, solution cost)
     :rtype: List[State], int
     """
@@ -166,25 +210,34 @@ def dfs(init_board):
     # check if its goal state if so return
     # and run dfs on it
 
-    init_state = State(init_board, heuristic_zero, 0, 0, None)
+    hfn = heuristic_zero if stats is None else stats.instrument(heuristic_zero)
+    init_state = State(init_board, hfn, 0, 0, None)
+    # the stack only holds states still to be explored; how they were reached is in the graph
+    graph = SearchGraph()
+    init_state.node = graph.add(-1, NO_MOVE)
     visited = set()
     stk = [init_state]
 
     while len(stk) > 0:
         curr_state = stk.pop()
-        curr_state_board = curr_state.board.__str__()
 
-        if curr_state_board not in visited:
+        if curr_state.key not in visited:
             if is_goal(curr_state):
-                path = get_path(curr_state)
+                path = graph.path(init_board, curr_state.node, hfn)
                 return (path, len(path))
-            successors = get_successors(curr_state)
+            successors = get_successors(curr_state, stats)
             for suc in successors:
+                suc.parent = None
+                suc.node = graph.add(curr_state.node, suc.move, suc.depth - curr_state.depth)
                 stk.append(suc)
-            visited.add(curr_state_board)
+            visited.add(curr_state.key)
+            if stats is not None:
+                stats.sample(len(stk), len(visited))
+        elif stats is not None:
+            stats.duplicates += 1
     return ([], -1)
 
-def a_star(init_board, hfn):
+def a_star(init_board, hfn, stats=None):
     """
     Run the A_star search algorithm given an initial board and a heuristic function.
 
@@ -197,31 +250,250 @@ def a_star(init_board, hfn):
     :type init_board: Board
     :param hfn: The heuristic function.
     :type hfn: Heuristic (a function that consumes a Board and produces a numeric heuristic value)
+    :param stats: Statistics to fill in during the search.
+    :type stats: Optional[SearchStats]
     :return: (the path to goal state, solution cost)
     :rtype: List[State], int
     """
 
+    if stats is not None:
+        hfn = stats.instrument(hfn)
     init_state = State(init_board, hfn, 0, 0, None)
-    visited = set()
+    init_state.f = init_state.h
+    # explored states are dropped once expanded; how they were reached is in the graph
+    graph = SearchGraph()
+    init_state.node = graph.add(-1, NO_MOVE)
+    closed = set()
+    # the lowest g (depth) each key was queued with; a state popped with a higher one is stale
+    best_g = {init_state.key: 0}
+    # entries are (f, h, insertion order, state): ties go to the lower h, i.e. the deeper
+    # state, then to the older entry, so States never have to be compared
+    counter = 0
     min_heap = []
-    heappush(min_heap, (hfn(init_state.board), init_state))
+    heappush(min_heap, (init_state.f, init_state.h, counter, init_state))
 
     while len(min_heap) > 0:
-        curr_state = heappop(min_heap)[1]
-        curr_state_board = curr_state.board.__str__()
+        curr_state = heappop(min_heap)[3]
+
+        if curr_state.key in closed or curr_state.depth > best_g[curr_state.key]:
+            if stats is not None:
+                stats.duplicates += 1
+            continue
+        if is_goal(curr_state):
+            path = graph.path(init_board, curr_state.node, hfn)
+            return (path, len(path)-1)
+
+        closed.add(curr_state.key)
+        successors = get_successors(curr_state, stats)
+        for successor in successors:
+            # skip states that are closed or already queued at least as cheaply
+            if successor.key in closed or best_g.get(successor.key, math.inf) <= successor.depth:
+                if stats is not None:
+                    stats.pushes_avoided += 1
+                continue
+            best_g[successor.key] = successor.depth
+            successor.parent = None
+            successor.node = graph.add(curr_state.node, successor.move, successor.depth - curr_state.depth)
+            counter += 1
+            heappush(min_heap, (successor.f, successor.h, counter, successor))
+        if stats is not None:
+            stats.sample(len(min_heap), len(closed))
+
+    return ([], -1)
 
-        if curr_state_board not in visited:
+def ida_star(init_board, hfn, tt_size=DEFAULT_TT_SIZE, stats=None):
+    """
+    Run the iterative deepening A* search algorithm given an initial board and a heuristic function.
+
+    Each iteration is a depth first search that cuts off states whose f value exceeds
+    the bound, which then grows to the smallest f value that was cut off. Only the
+    current path and a transposition table of at most tt_size keys are kept, so memory
+    stays flat; with an admissible heuristic the solution found is optimal.
+
+    If the function finds a goal state, it returns a list of states representing
+    the path from the initial state to the goal state in order and the cost of
+    the solution found.
+    Otherwise, it returns am empty list and -1.
+
+    :param init_board: The initial starting board.
+    :type init_board: Board
+    :param hfn: The heuristic function.
+    :type hfn: Heuristic (a function that consumes a Board and produces a numeric heuristic value)
+    :param tt_size: The capacity of the transposition table.
+    :type tt_size: int
+    :param stats: Statistics to fill in during the search.
+    :type stats: Optional[SearchStats]
+    :return: (the path to goal state, solution cost)
+    :rtype: List[State], int
+    """
+
+    init_state = State(init_board, hfn, 0, 0, None)
+    init_state.f = init_state.h
+    table = TranspositionTable(tt_size)
+    bound = init_state.f
+
+    while True:
+        next_bound = math.inf
+        table.clear()
+        on_path = set()
+        # one iterator of untried states per depth, best f first
+        stack = [iter([init_state])]
+        path_states = [None]
+
+        while stack:
+            curr_state = next(stack[-1], None)
+            if curr_state is None:
+                stack.pop()
+                on_path.discard(path_states.pop())
+                continue
+            if curr_state.f > bound:
+                next_bound = min(next_bound, curr_state.f)
+                continue
+            if curr_state.key in on_path or table.probe(curr_state.key, curr_state.depth):
+                continue
             if is_goal(curr_state):
+                if stats is not None:
+                    stats.tt_evictions += table.evictions
                 path = get_path(curr_state)
                 return (path, len(path)-1)
-            
-            successors = get_successors(curr_state)
-            for successor in successors:
-                heappush(min_heap, (successor.f, successor))
-            visited.add(curr_state_board)
-            
+
+            successors = get_successors(curr_state, stats)
+            successors.sort(key=lambda successor: successor.f)
+            stack.append(iter(successors))
+            path_states.append(curr_state.key)
+            on_path.add(curr_state.key)
+
+        if stats is not None:
+            stats.iterations += 1
+        if next_bound == math.inf:
+            break
+        bound = next_bound
+
+    if stats is not None:
+        stats.tt_evictions += table.evictions
     return ([], -1)
 
+def anytime_a_star(init_board, hfn, time_limit=None, weights=DEFAULT_WEIGHTS, stats=None):
+    """
+    Run the anytime repairing A* (ARA*) search algorithm given an initial board and a heuristic function.
+
+    The first iteration is a weighted A* search with f = g + weights[0] * h, which finds a
+    solution quickly. Every following iteration lowers the weight and keeps improving the
+    best solution found so far, reusing the g values and the states of the earlier ones.
+    With an admissible heuristic and a last weight of 1, the final solution is optimal.
+
+    The search stops when the weights run out or when time_limit seconds have passed,
+    and returns the best solution found by then.
+
+    If the function finds a goal state, it returns a list of states representing
+    the path from the initial state to the goal state in order and the cost of
+    the solution found.
+    Otherwise, it returns am empty list and -1.
+
+    :param init_board: The initial starting board.
+    :type init_board: Board
+    :param hfn: The heuristic function.
+    :type hfn: Heuristic (a function that consumes a Board and produces a numeric heuristic value)
+    :param time_limit: The wall-clock budget in seconds, or None for no limit.
+    :type time_limit: Optional[float]
+    :param weights: The decreasing heuristic weights of the iterations.
+    :type weights: Sequence[float]
+    :param stats: Statistics to fill in during the search, including the time to the first
+                  solution and the suboptimality bound of the returned one.
+    :type stats: Optional[SearchStats]
+    :return: (the path to goal state, solution cost)
+    :rtype: List[State], int
+    """
+
+    time_start = time.time()
+    deadline = math.inf if time_limit is None else time_start + time_limit
+
+    init_state = State(init_board, hfn, 0, 0, None)
+    # the best state known for each key, i.e. the one with the lowest g
+    best = {init_state.key: init_state}
+    open_states = {init_state.key: init_state}
+    closed = set()
+    # closed states whose g improved during the current iteration
+    incons = {}
+    incumbent = init_state if is_goal(init_state) else None
+    incumbent_cost = 0 if incumbent is not None else math.inf
+    counter = 0
+
+    for weight in weights:
+        # queue every open state under the new weight; stale heap entries are skipped when popped
+        min_heap = []
+        for state in open_states.values():
+            counter += 1
+            min_heap.append((state.depth + weight * state.h, state.h, counter, state))
+        heapq.heapify(min_heap)
+
+        timed_out = False
+        while min_heap and min_heap[0][0] < incumbent_cost:
+            if time.time() > deadline:
+                timed_out = True
+                break
+            curr_state = heappop(min_heap)[3]
+            if open_states.get(curr_state.key) is not curr_state:
+                continue
+            del open_states[curr_state.key]
+            closed.add(curr_state.key)
+
+            for successor in get_successors(curr_state, stats):
+                known = best.get(successor.key)
+                if known is not None and known.depth <= successor.depth:
+                    if stats is not None:
+                        stats.pushes_avoided += 1
+                    continue
+                best[successor.key] = successor
+                if is_goal(successor) and successor.depth < incumbent_cost:
+                    incumbent = successor
+                    incumbent_cost = successor.depth
+                    if stats is not None and stats.first_solution_time is None:
+                        stats.first_solution_time = time.time() - time_start
+                if successor.key in closed:
+                    incons[successor.key] = successor
+                else:
+                    open_states[successor.key] = successor
+                    counter += 1
+                    heappush(min_heap, (successor.depth + weight * successor.h, successor.h, counter, successor))
+
+        # the solution is within incumbent_cost / (lowest g + h still to explore) of optimal
+        lowest_f = min([state.f for state in open_states.values()] +
+                       [state.f for state in incons.values()], default=math.inf)
+        bound = 1 if lowest_f >= incumbent_cost else min(weight, incumbent_cost / max(lowest_f, 1))
+        if stats is not None and incumbent is not None:
+            stats.suboptimality_bound = bound
+        if timed_out or bound <= 1:
+            break
+
+        for key, state in incons.items():
+            open_states[key] = state
+        incons = {}
+        closed = set()
+
+    if incumbent is None:
+        return ([], -1)
+    path = get_path(incumbent)
+    return (path, len(path)-1)
+
+def basic_box_cost(board, box):
+    """
+    Returns the Manhattan distance between the given box and its closest storage point.
+
+    :param board: The current board.
+    :type board: Board
+    :param box: The position of a box on the board.
+    :type box: tuple
+    :return: The distance.
+    :rtype: int
+    """
+    min_dist = 2**31
+    for storage in board.storage:
+        dist = abs(box[0] - storage[0]) + abs(box[1] - storage[1])
+        if dist < min_dist:
+            min_dist = dist
+    return min_dist
+
 def heuristic_basic(board):
     """
     Returns the heuristic value for the given board
@@ -236,25 +508,34 @@ def heuristic_basic(board):
     :rtype: int
     """
 
-    # first find the closest storage locations to each box coord, then calculate manhattan distances
     total = 0
-    closest = {}
-
-    for i in range(len(board.boxes)):
-        box = board.boxes[i]
-        min_dist = 2**31
-        closest[str(i)] = min_dist
-        for storage in board.storage:
-            dist = abs(box[0] - storage[0]) + abs(box[1] - storage[1])
-            if dist < closest[str(i)]:
-                # calculate manhattan distance and store it
-                closest[str(i)] = dist
-        
-    for key, val in closest.items():
-        total = total + val
-
+    for box in board.boxes:
+        total += basic_box_cost(board, box)
     return total
 
+heuristic_basic.box_cost = basic_box_cost
+
+def advanced_box_cost(board, box):
+    """
+    Returns the Manhattan distance between the given box and its closest storage point,
+    plus one for every wall next to the box.
+
+    :param board: The current board.
+    :type board: Board
+    :param box: The position of a box on the board.
+    :type box: tuple
+    :return: The cost of the box.
+    :rtype: int
+    """
+    cost = basic_box_cost(board, box)
+
+    # now add to the distances if we have walls around box
+    level = board.level
+    for dir, dx, dy in DIRECTIONS:
+        if level.is_wall(box[0] + dx, box[1] + dy):
+            cost += 1
+    return cost
+
 def heuristic_advanced(board):
     """
     An advanced heuristic of your own choosing and invention.
@@ -264,35 +545,83 @@ def heuristic_advanced(board):
     :return: The heuristic value.
     :rtype: int
     """
-    # first find the closest storage locations to each box coord, then calculate manhattan distances
     total = 0
-    closest = {}
-
-    for i in range (len(board.boxes)):
-        box = board.boxes[i]
-        min_dist = 2**31
-        closest[str(i)] = min_dist
-        for storage in board.storage:
-            dist = abs(box[0] - storage[0]) + abs(box[1] - storage[1])
-            if dist < closest[str(i)]:
-                # calculate manhattan distance and store it
-                closest[str(i)] = dist
-    
-    # now add to the distances if we have walls around box
-    for i in range(len(board.boxes)):
-        box = board.boxes[i]
-        surroundings = [(box[0], box[1]-1), (box[0], box[1]+1), (box[0]-1, box[1], box[0]+1, box[1])]
-        for loc in surroundings:
-            if loc in board.obstacles:
-                closest[str(i)] = closest[str(i)] + 1
+    for box in board.boxes:
+        total += advanced_box_cost(board, box)
+    return total
 
-    for key, val in closest.items():
-        total = total + val
+heuristic_advanced.box_cost = advanced_box_cost
+# the penalty for walls next to a box can overestimate, so A* with it isn't guaranteed optimal
+heuristic_advanced.admissible = False
 
-    return total
+
+# The heuristics that can be chosen by name.
+HEURISTICS = {
+    'zero': heuristic_zero,
+    'basic': heuristic_basic,
+    'advanced': heuristic_advanced,
+    'matching': heuristic_matching,
+}
+
+# The search algorithms that can be chosen by name, with the name they are announced by.
+ALGORITHMS = {
+    'a_star': "A* search",
+    'dfs': "DFS",
+    'push_a_star': "push-level A* search",
+    'ida_star': "IDA* search",
+    'anytime_a_star': "anytime weighted A* search",
+    'bidirectional': "bidirectional push/pull search",
+    'parallel_a_star': "hash-distributed parallel A* search",
+    'portfolio': "portfolio of searches",
+}
+
+# The algorithms that return an optimal solution when their heuristic is admissible.
+OPTIMAL_ALGORITHMS = ('a_star', 'ida_star', 'parallel_a_star')
+
+# The algorithms that only handle boards with a single robot.
+SINGLE_ROBOT_ALGORITHMS = ('push_a_star', 'bidirectional')
 
 
-def solve_puzzle(board: Board, algorithm: str, hfn):
+def search(board: Board, algorithm: str, hfn, stats=None, tt_size=DEFAULT_TT_SIZE, time_limit=None):
+    """
+    Run the given type of algorithm on the board.
+
+    :param algorithm: the search algorithm, one of ALGORITHMS except 'portfolio'
+    :type algorithm: str
+    :param hfn: The heuristic function
+    :type hfn: Optional[Heuristic]
+    :param stats: Statistics to fill in during the search.
+    :type stats: Optional[SearchStats]
+    :param tt_size: The capacity of the transposition table of ida_star.
+    :type tt_size: int
+    :param time_limit: The wall-clock budget in seconds of anytime_a_star, or None for no limit.
+    :type time_limit: Optional[float]
+    :return: (the path to goal state, solution cost)
+    :rtype: List[State], int
+    """
+    if algorithm == 'a_star':
+        return a_star(board, hfn, stats)
+    elif algorithm == 'dfs':
+        return dfs(board, stats)
+    elif algorithm == 'push_a_star':
+        from pushsearch import push_a_star
+        return push_a_star(board, hfn, stats)
+    elif algorithm == 'ida_star':
+        return ida_star(board, hfn, tt_size, stats)
+    elif algorithm == 'bidirectional':
+        from bidirectional import bidirectional_search
+        return bidirectional_search(board, hfn, stats)
+    elif algorithm == 'anytime_a_star':
+        return anytime_a_star(board, hfn, time_limit, DEFAULT_WEIGHTS, stats)
+    elif algorithm == 'parallel_a_star':
+        from parallel_astar import parallel_a_star
+        return parallel_a_star(board, hfn, stats=stats)
+    else:
+        raise NotImplementedError
+
+
+def solve_puzzle(board: Board, algorithm: str, hfn, tt_size=DEFAULT_TT_SIZE, time_limit=None,
+                 portfolio_cache=None, verbose=False, solution_cache=None, stats_file=None, heuristic_cache=None):
     """
     Solve the given puzzle using the given type of algorithm.
 
@@ -300,6 +629,22 @@ def solve_puzzle(board: Board, algorithm: str, hfn):
     :type algorithm: str
     :param hfn: The heuristic function
     :type hfn: Optional[Heuristic]
+    :param tt_size: The capacity of the transposition table of ida_star.
+    :type tt_size: int
+    :param time_limit: The wall-clock budget in seconds of anytime_a_star and of the portfolio,
+                       or None for no limit.
+    :type time_limit: Optional[float]
+    :param portfolio_cache: The file remembering the winning configuration of the portfolio per level.
+    :type portfolio_cache: Optional[str]
+    :param verbose: Print the board after every step of the solution instead of its move string.
+    :type verbose: bool
+    :param solution_cache: The cache solutions are looked up in first and stored in after a search.
+    :type solution_cache: Optional[SolutionCache]
+    :param stats_file: The file the search statistics are written to as JSON.
+    :type stats_file: Optional[str]
+    :param heuristic_cache: The number of box layouts whose heuristic value is cached, or None for no cache.
+                            Only a heuristic that depends on the boxes alone can be cached.
+    :type heuristic_cache: Optional[int]
 
     :return: the path from the initial state to the goal state
     :rtype: List[State]
@@ -308,23 +653,45 @@ def solve_puzzle(board: Board, algorithm: str, hfn):
     print("Initial board")
     board.display()
 
+    if algorithm not in ALGORITHMS:
+        raise NotImplementedError
+    # only an optimal search with an admissible heuristic is known to find an optimal solution,
+    # and it must not be answered with anything less
+    optimal = algorithm in OPTIMAL_ALGORITHMS and getattr(hfn, 'admissible', True)
+
+    stats = SearchStats()
+    if heuristic_cache:
+        from heuristic_cache import HeuristicCache
+        hfn = HeuristicCache(hfn, heuristic_cache, stats)
     time_start = time.time()
-
-    if algorithm == 'a_star':
-        print("Executing A* search")
-        path, step = a_star(board, hfn)
-    elif algorithm == 'dfs':
-        print("Executing DFS")
-        path, step = dfs(board)
+    stats.start()
+
+    cached = None
+    if solution_cache is not None:
+        cached = solution_cache.lookup(board, hfn, optimal)
+    if cached is not None:
+        print("Solution found in the solution cache")
+        path, step = cached
     else:
-        raise NotImplementedError
+        print("Executing " + ALGORITHMS[algorithm])
+        if algorithm == 'portfolio':
+            from portfolio import solve_portfolio
+            path, step = solve_portfolio(board, time_limit=time_limit, cache_file=portfolio_cache, stats=stats)
+        else:
+            path, step = search(board, algorithm, hfn, stats, tt_size, time_limit)
+        if solution_cache is not None and path:
+            solution_cache.store(board, path, step, algorithm, optimal)
 
     time_end = time.time()
     time_elapsed = time_end - time_start
+    stats.stop()
+    if stats_file is not None:
+        stats.write_json(stats_file)
 
     if not path:
 
         print('No solution for this puzzle')
+        stats.display()
         return []
 
     else:
@@ -334,15 +701,19 @@ def solve_puzzle(board: Board, algorithm: str, hfn):
 
         print('Solution is: ')
 
-        counter = 0
-        while counter < len(path):
-            print(counter + 1)
-            path[counter].board.display()
-            print()
-            counter += 1
+        if verbose:
+            counter = 0
+            while counter < len(path):
+                print(counter + 1)
+                path[counter].board.display()
+                print()
+                counter += 1
+        else:
+            print(path_to_moves(path))
 
         print('Solution cost: {}'.format(step))
         print('Time taken: {:.2f}s'.format(time_elapsed))
+        stats.display()
 
         return path
 
@@ -366,7 +737,7 @@ if __name__ == "__main__":
         "--algorithm",
         type=str,
         required=True,
-        choices=['a_star', 'dfs'],
+        choices=list(ALGORITHMS),
         help="The searching algorithm."
     )
     parser.add_argument(
@@ -374,29 +745,135 @@ if __name__ == "__main__":
         type=str,
         required=False,
         default=None,
-        choices=['zero', 'basic', 'advanced'],
+        choices=list(HEURISTICS) + ['pdb'],
         help="The heuristic used for any heuristic search."
     )
+    parser.add_argument(
+        "--pdb-file",
+        type=str,
+        required=False,
+        default=None,
+        help="The pattern database of the puzzle, built with patterndb.py, for the pdb heuristic."
+    )
+    parser.add_argument(
+        "--tt-size",
+        type=int,
+        required=False,
+        default=DEFAULT_TT_SIZE,
+        help="The number of states the transposition table of ida_star can hold."
+    )
+    parser.add_argument(
+        "--time-limit",
+        type=float,
+        required=False,
+        default=None,
+        help="The wall-clock budget in seconds of anytime_a_star and of the portfolio."
+    )
+    parser.add_argument(
+        "--portfolio-cache",
+        type=str,
+        required=False,
+        default=None,
+        help="The file that remembers which portfolio configuration won on each level."
+    )
+    parser.add_argument(
+        "--output-format",
+        type=str,
+        required=False,
+        default='moves',
+        choices=['moves', 'boards'],
+        help="Write the solution as a move string (see moves.py), or as every board along the way."
+    )
+    parser.add_argument(
+        "--solution-cache",
+        type=str,
+        required=False,
+        default=None,
+        help="The file of the persistent solution cache; solved levels are answered from it."
+    )
+    parser.add_argument(
+        "--solution-cache-size",
+        type=int,
+        required=False,
+        default=None,
+        help="The number of solutions the solution cache keeps."
+    )
+    parser.add_argument(
+        "--stats-json",
+        type=str,
+        required=False,
+        default=None,
+        help="The file the search statistics are written to as JSON."
+    )
+    parser.add_argument(
+        "--heuristic-cache",
+        type=int,
+        required=False,
+        default=None,
+        help="Cache the heuristic values of this many box layouts (boxes-only heuristics)."
+    )
+    parser.add_argument(
+        "--verbose",
+        action='store_true',
+        help="Print every board of the solution."
+    )
     args = parser.parse_args()
+    if args.tt_size < 1:
+        parser.error("--tt-size needs room for at least one state")
 
     # set the heuristic function
     heuristic = heuristic_zero
-    if args.heuristic == 'basic':
-        heuristic = heuristic_basic
-    elif args.heuristic == 'advanced':
-        heuristic = heuristic_advanced
+    if args.heuristic == 'pdb':
+        if args.pdb_file is None:
+            parser.error("the pdb heuristic needs --pdb-file")
+        from patterndb import PatternDatabase
+        try:
+            heuristic = PatternDatabase(args.pdb_file)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+    elif args.heuristic is not None:
+        heuristic = HEURISTICS[args.heuristic]
+
+    if args.heuristic_cache is not None:
+        from heuristic_cache import is_boxes_only
+        if args.heuristic_cache < 1:
+            parser.error("--heuristic-cache needs room for at least one box layout")
+        if not is_boxes_only(heuristic):
+            parser.error("the {} heuristic depends on the robots and can't be cached".format(args.heuristic))
 
     # read the boards from the file
     board = read_from_file(args.inputfile)
+    if args.heuristic == 'pdb':
+        try:
+            heuristic.check(board.level)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.algorithm in SINGLE_ROBOT_ALGORITHMS and len(board.robots) != 1:
+        parser.error("{} needs a puzzle with a single robot; {} has {}".format(
+            args.algorithm, args.inputfile, len(board.robots)))
+
+    solution_cache = None
+    if args.solution_cache is not None:
+        from solution_cache import SolutionCache, DEFAULT_CACHE_SIZE
+        cache_size = DEFAULT_CACHE_SIZE if args.solution_cache_size is None else args.solution_cache_size
+        if cache_size < 1:
+            parser.error("--solution-cache-size needs room for at least one solution")
+        solution_cache = SolutionCache(args.solution_cache, cache_size)
 
     # solve the puzzles
-    path = solve_puzzle(board, args.algorithm, heuristic)
+    path = solve_puzzle(board, args.algorithm, heuristic, args.tt_size, args.time_limit, args.portfolio_cache,
+                        args.verbose, solution_cache, args.stats_json, args.heuristic_cache)
+    if solution_cache is not None:
+        solution_cache.close()
 
     # save solution in output file
     outputfile = open(args.outputfile, "w")
-    counter = 1
-    for state in path:
-        print(counter, file=outputfile)
-        print(state.board, file=outputfile)
-        counter += 1
+    if args.output_format == 'boards':
+        counter = 1
+        for state in path:
+            print(counter, file=outputfile)
+            print(state.board, file=outputfile)
+            counter += 1
+    elif path:
+        print(path_to_moves(path), file=outputfile)
     outputfile.close()
\ No newline at end of file
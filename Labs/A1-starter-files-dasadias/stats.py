@@ -0,0 +1,203 @@
+############################################################
+## CSC 384, Intro to AI, University of Toronto.
+## Assignment 1
+##
+## Counters that the searches fill in while they run, so that
+## changes to the algorithms and heuristics can be compared.
+############################################################
+
+import json
+import time
+
+# Seconds between two samples of the expansion rate.
+SAMPLE_INTERVAL = 1.0
+
+# Expansions between two looks at the clock while sampling.
+SAMPLE_EVERY = 1024
+
+
+class SearchStats:
+    """
+    Statistics collected by a single search.
+    """
+
+    def __init__(self):
+        self.expanded = 0  # states whose successors were generated
+        self.generated = 0  # successor states created
+        # measured only by the searches that call instrument(); None otherwise
+        self.duplicates = None  # states popped from the frontier that were already closed or reached more cheaply
+        self.peak_frontier = None  # the most states the frontier held at once
+        self.peak_closed = None  # the most states the closed set held at once
+        self.heuristic_evaluations = None  # calls to the heuristic or to its per-box cost
+        self.heuristic_time = None  # seconds spent in those calls
+        self.heuristic_cache_hits = 0  # heuristic values found in the heuristic cache
+        self.heuristic_cache_misses = 0  # heuristic values the heuristic cache had to compute
+        self.dead_square_prunes = 0  # pushes onto a dead square that were never generated
+        self.deadlock_prunes = 0  # successors rejected by the freeze / 2x2 deadlock detector
+        self.tunnel_macros = 0  # boxes pushed through a tunnel as a single successor
+        self.pushes_avoided = 0  # successors not queued because they were closed or queued more cheaply
+        self.iterations = 0  # completed iterations of an iterative deepening search
+        self.tt_evictions = 0  # keys evicted from a full transposition table
+        self.first_solution_time = None  # seconds until an anytime search found its first solution
+        self.suboptimality_bound = None  # how far from optimal an anytime search's solution can be
+        self.winner = None  # the algorithm/heuristic configuration that won a portfolio race
+        self.elapsed = None  # seconds between start() and stop()
+        self.rate_samples = []  # (seconds since start, states expanded, expansions per second) over time
+        self._start = None
+        self._last_sample = (0.0, 0)
+        self._next_sample = SAMPLE_EVERY
+
+    def start(self):
+        """
+        Starts the clock that the elapsed time and the expansion rate are measured with.
+        """
+        self._start = time.perf_counter()
+        self._last_sample = (0.0, self.expanded)
+
+    def stop(self):
+        """
+        Stops the clock.
+        """
+        if self._start is not None:
+            self.elapsed = time.perf_counter() - self._start
+
+    def sample(self, frontier_size, closed_size):
+        """
+        Records the sizes of the frontier and the closed set after an expansion,
+        and every SAMPLE_INTERVAL seconds the expansion rate since the previous sample.
+        Only call it after instrument().
+
+        :param frontier_size: The number of states in the frontier.
+        :type frontier_size: int
+        :param closed_size: The number of states in the closed set.
+        :type closed_size: int
+        """
+        if frontier_size > self.peak_frontier:
+            self.peak_frontier = frontier_size
+        if closed_size > self.peak_closed:
+            self.peak_closed = closed_size
+        if self.expanded < self._next_sample:
+            return
+        self._next_sample = self.expanded + SAMPLE_EVERY
+        if self._start is None:
+            self.start()
+            return
+        now = time.perf_counter() - self._start
+        last_time, last_expanded = self._last_sample
+        if now - last_time >= SAMPLE_INTERVAL:
+            self.rate_samples.append((round(now, 3), self.expanded,
+                                      round((self.expanded - last_expanded) / (now - last_time), 1)))
+            self._last_sample = (now, self.expanded)
+
+    def instrument(self, hfn):
+        """
+        Turns on the measurements of duplicates, frontier and closed set sizes (see sample())
+        and heuristic calls, and returns the heuristic function wrapped so that its calls are
+        counted and timed. The wrapper keeps the box_cost and boxes_only attributes that
+        get_successors relies on.
+
+        :param hfn: The heuristic function.
+        :type hfn: Heuristic
+        :rtype: Heuristic
+        """
+        self.duplicates = self.duplicates or 0
+        self.peak_frontier = self.peak_frontier or 0
+        self.peak_closed = self.peak_closed or 0
+        self.heuristic_evaluations = self.heuristic_evaluations or 0
+        self.heuristic_time = self.heuristic_time or 0.0
+        clock = time.perf_counter
+
+        def timed_hfn(board):
+            start = clock()
+            value = hfn(board)
+            self.heuristic_time += clock() - start
+            self.heuristic_evaluations += 1
+            return value
+
+        box_cost = getattr(hfn, 'box_cost', None)
+        if box_cost is not None:
+            def timed_box_cost(board, box):
+                start = clock()
+                value = box_cost(board, box)
+                self.heuristic_time += clock() - start
+                self.heuristic_evaluations += 1
+                return value
+            timed_hfn.box_cost = timed_box_cost
+        if getattr(hfn, 'boxes_only', False):
+            timed_hfn.boxes_only = True
+        return timed_hfn
+
+    def expansion_rate(self):
+        """
+        Returns the average number of states expanded per second, or None before stop().
+
+        :rtype: Optional[float]
+        """
+        if not self.elapsed:
+            return None
+        return self.expanded / self.elapsed
+
+    def to_dict(self):
+        """
+        Returns the statistics as a dictionary that can be serialized to JSON.
+
+        :rtype: dict
+        """
+        stats = {name: value for name, value in vars(self).items() if not name.startswith('_')}
+        stats['expansion_rate'] = self.expansion_rate()
+        return stats
+
+    def write_json(self, filename):
+        """
+        Writes the statistics to a JSON file.
+
+        :param filename: The name of the file.
+        :type filename: str
+        """
+        with open(filename, 'w') as file:
+            json.dump(self.to_dict(), file, indent=2)
+            file.write('\n')
+
+    def display(self):
+        rows = [
+            ('States expanded', self.expanded),
+            ('States generated', self.generated),
+        ]
+        # leave out what the search didn't measure rather than show it as zero
+        if self.duplicates is not None:
+            rows.append(('Duplicates', self.duplicates))
+        if self.peak_frontier is not None:
+            rows.append(('Peak frontier size', self.peak_frontier))
+            rows.append(('Peak closed set size', self.peak_closed))
+        if self.heuristic_evaluations is not None:
+            rows.append(('Heuristic evaluations', self.heuristic_evaluations))
+            rows.append(('Heuristic time', '{:.2f}s'.format(self.heuristic_time)))
+        rows.append(('Dead square prunes', self.dead_square_prunes))
+        rows.append(('Deadlock prunes', self.deadlock_prunes))
+        if self.winner is not None:
+            rows.insert(0, ('Winning configuration', self.winner))
+        if self.tunnel_macros:
+            rows.append(('Tunnel macro moves', self.tunnel_macros))
+        if self.heuristic_cache_hits or self.heuristic_cache_misses:
+            rows.append(('Heuristic cache hits', self.heuristic_cache_hits))
+            rows.append(('Heuristic cache misses', self.heuristic_cache_misses))
+        if self.pushes_avoided:
+            rows.append(('Frontier pushes avoided', self.pushes_avoided))
+        if self.iterations:
+            rows.append(('Iterations', self.iterations))
+        if self.tt_evictions:
+            rows.append(('Transposition table evictions', self.tt_evictions))
+        if self.first_solution_time is not None:
+            rows.append(('Time to first solution', '{:.2f}s'.format(self.first_solution_time)))
+        if self.suboptimality_bound is not None:
+            rows.append(('Cost bound', 'within {:.2f}x of optimal'.format(self.suboptimality_bound)))
+        if self.expansion_rate() is not None:
+            rows.append(('Expansions per second', '{:.0f}'.format(self.expansion_rate())))
+        for seconds, expanded, rate in self.rate_samples:
+            rows.append(('  at {:.1f}s'.format(seconds), '{:.0f}/s ({} expanded)'.format(rate, expanded)))
+
+        width = max(len(label) for label, value in rows)
+        print('Search statistics')
+        print('-' * (width + 16))
+        for label, value in rows:
+            print('{:<{}}  {:>12}'.format(label, width, str(value)))
@@ -0,0 +1,60 @@
+############################################################
+## CSC 384, Intro to AI, University of Toronto.
+## Assignment 1
+##
+## Fixed-capacity transposition table for memory-bounded searches.
+############################################################
+
+from collections import OrderedDict
+
+# Number of entries kept by default: a few hundred MB at most.
+DEFAULT_TT_SIZE = 1000000
+
+
+class TranspositionTable:
+    """
+    Remembers the smallest depth at which each state key was reached, for at most
+    capacity keys. When the table is full, the least recently used key is evicted,
+    so the table keeps the part of the search graph that is being worked on.
+    Losing an entry only costs pruning, never correctness.
+    """
+
+    def __init__(self, capacity=DEFAULT_TT_SIZE):
+        """
+        :param capacity: The maximum number of keys kept.
+        :type capacity: int
+        """
+        if capacity < 1:
+            raise ValueError("a transposition table needs room for at least one key")
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.evictions = 0
+
+    def probe(self, key, depth):
+        """
+        Returns True if key was already reached at the given depth or lower.
+        Otherwise records it at depth and returns False.
+
+        :param key: The compact key of a state.
+        :type key: int
+        :param depth: The depth the state is reached at.
+        :type depth: int
+        :rtype: bool
+        """
+        entries = self.entries
+        best = entries.get(key)
+        if best is not None:
+            entries.move_to_end(key)
+            if best <= depth:
+                return True
+        entries[key] = depth
+        if len(entries) > self.capacity:
+            entries.popitem(last=False)
+            self.evictions += 1
+        return False
+
+    def clear(self):
+        self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)